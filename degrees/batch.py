@@ -0,0 +1,113 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import degrees
+from util import fork_context
+
+
+def read_pairs(filename):
+    """
+    Reads (source, target) pairs, given by person_id or name, from a CSV file.
+    """
+    with open(filename, encoding="utf-8", newline="") as f:
+        for row in csv.reader(f):
+            # skip blank lines
+            if not row:
+                continue
+            if len(row) != 2:
+                raise ValueError(f"expected 'source,target', got {row}")
+            yield row[0].strip(), row[1].strip()
+
+
+def resolve(query):
+    """
+    Returns tuple of (person_id, error), exactly one of them is None.
+    """
+    matches = degrees.person_ids_for_query(query)
+    if len(matches) == 0:
+        return None, "not found"
+    if len(matches) > 1:
+        return None, f"ambiguous, matches {', '.join(matches)}"
+    return matches[0], None
+
+
+def group_pairs(pairs):
+    """
+    Groups pairs by resolved source.
+
+    Returns tuple of (groups, errors) where groups maps a source person_id
+    to a list of (source query, target query, target person_id) and errors
+    is a list of JSON records for pairs that could not be resolved.
+    """
+    groups = {}
+    errors = []
+    for source_query, target_query in pairs:
+        source, source_error = resolve(source_query)
+        target, target_error = resolve(target_query)
+        if source_error or target_error:
+            error = f"source {source_error}" if source_error else f"target {target_error}"
+            errors.append({"source": source_query, "target": target_query, "error": error})
+            continue
+        groups.setdefault(source, []).append((source_query, target_query, target))
+    return groups, errors
+
+
+def answer_group(group):
+    """
+    Answers every pair of a source from a single BFS tree.
+
+    Returns the list of JSON lines for the group.
+    """
+    source, queries = group
+    paths = degrees.shortest_paths_from(source, {target for _, _, target in queries})
+
+    lines = []
+    for source_query, target_query, target in queries:
+        path = paths[target]
+        lines.append(json.dumps({
+            "source": source_query,
+            "target": target_query,
+            "degrees": None if path is None else len(path),
+            "path": path
+        }))
+    return lines
+
+
+def init_worker(directory, compact, cache):
+    # forked workers share the parent's loaded data, others load their own copy
+    if not degrees.people:
+        degrees.load_data(directory, compact=compact, cache=cache)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer a file of degrees of separation queries.")
+    parser.add_argument("pairs", help="CSV file of source,target rows (person_ids or names)")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    degrees.add_load_arguments(parser)
+    args = parser.parse_args()
+
+    # load before the pool starts so forked workers inherit the graph read-only
+    degrees.load_data(args.directory, compact=args.compact, cache=args.cache,
+                      workers=args.workers)
+    groups, errors = group_pairs(read_pairs(args.pairs))
+
+    for error in errors:
+        print(json.dumps(error))
+
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=fork_context(),
+                             initializer=init_worker,
+                             initargs=(args.directory, args.compact, args.cache)) as pool:
+        # stream each group's answers as soon as it is done
+        for lines in pool.map(answer_group, groups.items()):
+            for line in lines:
+                print(line)
+            sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
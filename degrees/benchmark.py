@@ -0,0 +1,199 @@
+"""
+Benchmarks degrees.py on synthetic IMDB-shaped datasets.
+
+Generates people.csv, movies.csv and stars.csv with power-law cast sizes
+and actor popularity, then times load_data, shortest_path on near, far
+and disconnected pairs and the peak memory of each (size, backend) case,
+writing a JSON report that can be diffed between versions.
+
+Usage: python benchmark.py [--sizes 10000 1000000 10000000] [--output report.json]
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+import degrees
+
+SIZES = (10_000, 1_000_000, 10_000_000)
+BACKENDS = ("dict", "compact")
+
+# people in the island only star with each other, giving disconnected pairs
+ISLAND_PEOPLE = 10
+
+
+def generate(directory, credits, seed=0):
+    """
+    Writes a synthetic dataset with about credits rows in stars.csv.
+
+    Cast sizes follow a Pareto distribution and actors are picked with a
+    skew towards low ids, so a few prolific actors act as hubs like on IMDB.
+    """
+    rng = random.Random(seed)
+    num_people = max(credits // 2, 2 * ISLAND_PEOPLE)
+    num_movies = max(credits // 4, 4)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for person in range(num_people):
+            writer.writerow([person, f"Person {person}", 1920 + person % 90])
+
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for movie in range(num_movies):
+            writer.writerow([movie, f"Movie {movie}", 1930 + movie % 90])
+
+    with open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        connected = num_people - ISLAND_PEOPLE
+        written = 0
+        movie = 0
+        # the last movies link the island people among themselves only
+        while written < credits - ISLAND_PEOPLE and movie < num_movies - 2:
+            cast_size = min(int(rng.paretovariate(1.2)), 200)
+            for _ in range(cast_size):
+                writer.writerow([int(connected * rng.random() ** 3), movie])
+            written += cast_size
+            movie += 1
+        for person in range(connected, num_people):
+            writer.writerow([person, num_movies - 1 - person % 2])
+        writer.writerow([connected, num_movies - 2])
+
+
+def dataset_directory(data_dir, credits):
+    """
+    Returns the directory of the dataset for credits, generating it once.
+    """
+    directory = os.path.join(data_dir, f"credits_{credits}")
+    if not os.path.exists(os.path.join(directory, "stars.csv")):
+        generate(directory, credits)
+    return directory
+
+
+def pick_pairs(num_people):
+    """
+    Returns a dict of pair kind to (source, target) person_ids on the
+    loaded data: a hub and one of its co-stars, the hub and the person
+    farthest from it, and the hub and an island person.
+    """
+    hub = "0"
+    neighbors = [person_id for _, person_id in degrees.neighbors_for_person(hub) if person_id != hub]
+    search_graph, _, _ = degrees.loaded_data()
+
+    # parents enter the BFS tree before their children, so depths follow in one pass
+    tree = degrees.bfs_tree(search_graph.state(hub), None, search_graph)
+    depth = {}
+    for person, step in tree.items():
+        depth[person] = 0 if step is None else depth[step[1]] + 1
+    # the smallest id of the deepest layer, whatever order the backend visits in
+    deepest = max(depth.values())
+    farthest = min(search_graph.person_id(person) for person, d in depth.items() if d == deepest)
+    return {
+        "near": (hub, min(neighbors)),
+        "far": (hub, farthest),
+        "disconnected": (hub, str(num_people - 1))
+    }
+
+
+def run_case(directory, backend, repeat):
+    """
+    Loads one dataset with one backend and times its queries, in the
+    current process so that its peak memory is the case's own.
+    """
+    start = time.perf_counter()
+    degrees.load_data(directory, compact=backend == "compact")
+    load_seconds = time.perf_counter() - start
+
+    queries = {}
+    for kind, (source, target) in pick_pairs(len(degrees.people)).items():
+        timings = []
+        path = None
+        for _ in range(repeat):
+            # every run must search, not hit the path cache
+            degrees.path_cache.clear()
+            start = time.perf_counter()
+            path = degrees.shortest_path(source, target)
+            timings.append(time.perf_counter() - start)
+        queries[kind] = {
+            "source": source,
+            "target": target,
+            "degrees": None if path is None else len(path),
+            "median_seconds": statistics.median(timings)
+        }
+
+    return {
+        "load_seconds": load_seconds,
+        "peak_memory_mb": peak_memory_mb(),
+        "queries": queries
+    }
+
+
+def peak_memory_mb():
+    """
+    Returns the peak resident memory of this process in MB, None if unknown.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark degrees.py on synthetic data.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES,
+                        help="numbers of credits to generate datasets with")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=BACKENDS)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per query, the median is kept")
+    parser.add_argument("--data-dir", default="bench_data")
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--run-case", nargs=2, metavar=("DIRECTORY", "BACKEND"),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # child process measuring a single case
+    if args.run_case:
+        print(json.dumps(run_case(*args.run_case, args.repeat)))
+        return
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cases": []
+    }
+    for credits in args.sizes:
+        directory = dataset_directory(args.data_dir, credits)
+        for backend in args.backends:
+            print(f"Benchmarking {credits} credits on {backend}...", file=sys.stderr)
+            # a fresh process per case keeps peak memory readings apart
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--run-case", directory, backend,
+                 "--repeat", str(args.repeat)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            case = {"credits": credits, "backend": backend}
+            case.update(json.loads(output))
+            report["cases"].append(case)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
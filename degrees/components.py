@@ -0,0 +1,97 @@
+from array import array
+
+
+class ComponentIndex():
+    """
+    Connected components of the person-movie graph, labelled with a
+    union-find over people so that connectivity checks are near O(1).
+    """
+    def __init__(self, index):
+        # index maps each person_id to a dense int used by the union-find
+        self.index = index
+        self.parent = array("i", range(len(index)))
+        self.size = array("i", [1]) * len(index)
+
+    @classmethod
+    def from_data(cls, people, movies):
+        """
+        Builds the index from the people and movies dicts of degrees.py.
+        """
+        components = cls({person_id: i for i, person_id in enumerate(people)})
+        for movie in movies.values():
+            components.union_all(components.index[person_id] for person_id in movie["stars"])
+        return components
+
+    @classmethod
+    def from_graph(cls, graph):
+        """
+        Builds the index from a CompactGraph, sharing its person index.
+        """
+        components = cls(graph.person_index)
+        for movie in range(len(graph.movie_ids)):
+            components.union_all(graph.stars_of(movie))
+        return components
+
+    def extended(self, index):
+        """
+        Returns a copy of the index for a person index that may hold
+        new people, each starting in a component of their own.
+        """
+        extended = ComponentIndex.__new__(ComponentIndex)
+        extended.index = index
+        extended.parent = array("i", self.parent)
+        extended.parent.extend(range(len(self.parent), len(index)))
+        extended.size = array("i", self.size)
+        extended.size.extend([1] * (len(index) - len(self.size)))
+        return extended
+
+    def find(self, person):
+        """
+        Returns the root of the set containing person (as int).
+        """
+        parent = self.parent
+        while parent[person] != person:
+            # path halving keeps the trees flat
+            parent[person] = parent[parent[person]]
+            person = parent[person]
+        return person
+
+    def union(self, first, second):
+        first, second = self.find(first), self.find(second)
+        if first == second:
+            return
+        # attach the smaller set below the larger one
+        if self.size[first] < self.size[second]:
+            first, second = second, first
+        self.parent[second] = first
+        self.size[first] += self.size[second]
+
+    def union_all(self, people):
+        """
+        Joins every person (as int) of a movie's cast into one set.
+        """
+        people = iter(people)
+        first = next(people, None)
+        for person in people:
+            self.union(first, person)
+
+    def connected(self, source, target):
+        """
+        Returns True if two person_ids are in the same component.
+        """
+        return self.find(self.index[source]) == self.find(self.index[target])
+
+    def component_size(self, person_id):
+        """
+        Returns the number of people in the component of a person_id.
+        """
+        return self.size[self.find(self.index[person_id])]
+
+    def sizes(self):
+        """
+        Returns the sizes of all components, largest first.
+        """
+        return sorted(
+            (self.size[root] for root in range(len(self.parent)) if self.parent[root] == root),
+            reverse=True
+        )
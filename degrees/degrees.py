@@ -1,7 +1,19 @@
+import argparse
 import csv
+import heapq
+import itertools
+import math
 import sys
+import threading
 
-from util import Node, StackFrontier, QueueFrontier
+from components import ComponentIndex
+from graph import DictGraph, GraphBuilder, unseen_neighbors
+from ingest import load_stars
+from landmarks import LandmarkIndex
+from name_index import NameIndex
+from path_cache import PathCache
+from snapshot import load_snapshot, save_snapshot, source_stamp
+from util import Node, DequeQueueFrontier
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,10 +24,71 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# CompactGraph holding the person-movie edges when loaded with compact=True,
+# people and movies then only keep name, birth, title and year
+graph = None
 
-def load_data(directory):
+# ComponentIndex of the loaded data, people in different components are not connected
+components = None
+
+# LandmarkIndex built by build_landmarks, used for distance bounds and ALT search
+landmarks = None
+
+# NameIndex over names for prefix and fuzzy lookups, built with the data
+name_index = None
+
+# LRU cache of shortest_path results, cleared whenever the data changes
+path_cache = PathCache()
+
+# held while reading or swapping graph, components and landmarks together
+data_lock = threading.Lock()
+
+# held by apply_delta so that deltas are applied one at a time
+delta_lock = threading.Lock()
+
+
+def load_data(directory, compact=False, cache=False, workers=1):
     """
     Load data from CSV files into memory.
+
+    With compact, credits are stored in a CompactGraph instead of
+    the movies and stars sets of people and movies, and stars.csv is
+    parsed by workers processes. With cache, the compact graph is
+    memory-mapped from a snapshot file in directory, which is (re)written
+    whenever it is missing or older than the CSVs.
+
+    Returns the number of stars.csv rows skipped because their person or
+    movie is unknown, None when loaded from a snapshot.
+    """
+    global people, movies, names, graph, components, landmarks, name_index
+    # start from empty dicts, apply_delta may have swapped in copies shared with readers
+    people, movies, names = {}, {}, {}
+    landmarks = None
+    name_index = None
+    path_cache.clear()
+    if cache:
+        skipped = load_cached_data(directory, workers)
+    elif compact:
+        skipped = load_compact_data(directory, workers)
+    else:
+        graph = None
+        skipped = load_dict_data(directory)
+
+    # label connected components once so disconnected queries need no search
+    if graph is None:
+        components = ComponentIndex.from_data(people, movies)
+    else:
+        components = ComponentIndex.from_graph(graph)
+    name_index = NameIndex(names)
+
+    return skipped
+
+
+def load_dict_data(directory):
+    """
+    Load data from CSV files into people, movies and names.
+
+    Returns the number of stars.csv rows skipped.
     """
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
@@ -41,54 +114,284 @@ def load_data(directory):
                 "stars": set()
             }
 
-    # Load stars
+    # Load stars, skipping credits of unknown people or movies
+    skipped = 0
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+            person = people.get(row["person_id"])
+            movie = movies.get(row["movie_id"])
+            if person is None or movie is None:
+                skipped += 1
+                continue
+            person["movies"].add(row["movie_id"])
+            movie["stars"].add(row["person_id"])
+
+    return skipped
+
+
+def load_compact_data(directory, workers=1):
+    """
+    Load data from CSV files into people, movies, names and a CompactGraph,
+    parsing stars.csv in workers processes.
+
+    Returns the number of stars.csv rows skipped.
+    """
+    global graph
+    builder = GraphBuilder()
+
+    # Load people
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            people[row["id"]] = {
+                "name": row["name"],
+                "birth": row["birth"]
+            }
+            names.setdefault(row["name"].lower(), set()).add(row["id"])
+            builder.add_person(row["id"])
+
+    # Load movies
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            movies[row["id"]] = {
+                "title": row["title"],
+                "year": row["year"]
+            }
+            builder.add_movie(row["id"])
+
+    # Load stars, chunks of the file are parsed in parallel
+    skipped = load_stars(f"{directory}/stars.csv", builder, workers)
+
+    graph = builder.build()
+    return skipped
+
+
+def load_cached_data(directory, workers=1):
+    """
+    Load data from the snapshot of directory, building it from the CSV
+    files first if it is missing or stale.
+
+    Returns the number of stars.csv rows skipped, None if the snapshot was used.
+    """
+    global graph
+    snapshot = load_snapshot(directory)
+    if snapshot is None:
+        # stamp the sources before reading them, changes during the load make it stale
+        stamp = source_stamp(directory)
+        skipped = load_compact_data(directory, workers)
+        try:
+            save_snapshot(directory, graph, people, movies, stamp)
+        except OSError:
+            # an unwritable data directory only costs the next startup
+            pass
+        return skipped
+
+    graph, loaded_people, loaded_movies, loaded_names = snapshot
+    people.update(loaded_people)
+    movies.update(loaded_movies)
+    names.update(loaded_names)
+    return None
+
+
+def apply_delta(directory):
+    """
+    Applies the people.csv, movies.csv and stars.csv files of a delta
+    directory (each optional) to the loaded data. People and movies are
+    added or have their details replaced, credits are added.
+
+    The new version of the data and of the component and landmark indexes
+    is built beside the current one and swapped in at once, so searches
+    already running keep seeing the version they started on.
+
+    Returns the number of credits skipped because their person or movie
+    is unknown.
+    """
+    global people, movies, names, graph, components, landmarks, name_index
+    with delta_lock:
+        person_rows = read_delta_rows(directory, "people.csv")
+        movie_rows = read_delta_rows(directory, "movies.csv")
+        credits = [(row["person_id"], row["movie_id"])
+                   for row in read_delta_rows(directory, "stars.csv")]
+        search_graph, component_index, landmark_index = loaded_data()
+
+        # copy the top level dicts, changed entries are replaced and never mutated
+        new_people, new_movies, new_names = dict(people), dict(movies), dict(names)
+        for row in person_rows:
+            old = new_people.get(row["id"])
+            person = {"name": row["name"], "birth": row["birth"]}
+            if graph is None:
+                person["movies"] = set() if old is None else set(old["movies"])
+            new_people[row["id"]] = person
+            if old is not None:
+                new_names[old["name"].lower()] = new_names[old["name"].lower()] - {row["id"]}
+            new_names[row["name"].lower()] = new_names.get(row["name"].lower(), set()) | {row["id"]}
+        for row in movie_rows:
+            old = new_movies.get(row["id"])
+            movie = {"title": row["title"], "year": row["year"]}
+            if graph is None:
+                movie["stars"] = set() if old is None else set(old["stars"])
+            new_movies[row["id"]] = movie
+
+        if graph is None:
+            touched, skipped = add_dict_credits(new_people, new_movies, credits, person_rows, movie_rows)
+            new_graph = None
+            search_graph = DictGraph(new_people, new_movies)
+            index = dict(component_index.index)
+            for person_id in new_people:
+                index.setdefault(person_id, len(index))
+            casts = ([index[star] for star in search_graph.stars_of(movie)] for movie in touched)
+        else:
+            new_graph, touched, skipped = graph.with_delta(
+                [row["id"] for row in person_rows], [row["id"] for row in movie_rows], credits
+            )
+            search_graph = new_graph
+            index = new_graph.person_index
+            casts = (search_graph.stars_of(movie) for movie in touched)
+
+        # credits only ever join components and shorten distances
+        new_components = component_index.extended(index)
+        for cast in casts:
+            new_components.union_all(cast)
+        new_landmarks = landmark_index
+        if landmark_index is not None:
+            new_landmarks = landmark_index.updated(
+                search_graph, touched, None if new_graph is not None else index, len(index)
+            )
+
+        new_name_index = NameIndex(new_names)
+
+        with data_lock:
+            people, movies, names = new_people, new_movies, new_names
+            graph, components, landmarks = new_graph, new_components, new_landmarks
+            name_index = new_name_index
+            path_cache.clear()
+
+    return skipped
+
+
+def read_delta_rows(directory, filename):
+    """
+    Returns the rows of a delta CSV file, or an empty list if it is missing.
+    """
+    try:
+        with open(f"{directory}/{filename}", encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+    except FileNotFoundError:
+        return []
+
+
+def add_dict_credits(new_people, new_movies, credits, person_rows, movie_rows):
+    """
+    Adds credits to copies of the people and movies dicts, copying each
+    entry once before changing it.
+
+    Returns tuple of (movie_ids that gained credits, skipped credits).
+    """
+    # entries of delta rows are fresh already
+    copied_people = {row["id"] for row in person_rows}
+    copied_movies = {row["id"] for row in movie_rows}
+    touched = set()
+    skipped = 0
+    for person_id, movie_id in credits:
+        person = new_people.get(person_id)
+        movie = new_movies.get(movie_id)
+        if person is None or movie is None:
+            skipped += 1
+            continue
+        if person_id not in copied_people:
+            person = new_people[person_id] = dict(person, movies=set(person["movies"]))
+            copied_people.add(person_id)
+        if movie_id not in copied_movies:
+            movie = new_movies[movie_id] = dict(movie, stars=set(movie["stars"]))
+            copied_movies.add(movie_id)
+        person["movies"].add(movie_id)
+        movie["stars"].add(person_id)
+        touched.add(movie_id)
+    return touched, skipped
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(description="Find degrees of separation between two people.")
+    parser.add_argument("directory", nargs="?", default="large")
+    add_load_arguments(parser)
+    parser.add_argument("--landmarks", type=int, default=0, metavar="K",
+                        help="search with A* guided by K landmarks")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes parsing stars.csv for the compact graph")
+    parser.add_argument("--paths", type=int, default=1, metavar="K",
+                        help="show up to K shortest paths, newest movies first")
+    args = parser.parse_args()
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    skipped = load_data(args.directory, compact=args.compact, cache=args.cache,
+                        workers=args.workers)
+    if skipped:
+        print(f"Skipped {skipped} credits of unknown people or movies.")
+    if args.landmarks > 0:
+        build_landmarks(args.landmarks)
     print("Data loaded.")
 
-    source = person_id_for_name(input("Name: "))
+    source_name = input("Name: ")
+    source = person_id_for_name(source_name)
     if source is None:
-        sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
+        sys.exit(not_found_message(source_name))
+    target_name = input("Name: ")
+    target = person_id_for_name(target_name)
     if target is None:
-        sys.exit("Person not found.")
+        sys.exit(not_found_message(target_name))
 
-    path = shortest_path(source, target)
+    if args.paths > 1:
+        paths = ranked_shortest_paths(source, target, args.paths)
+    elif args.landmarks > 0:
+        paths = [alt_shortest_path(source, target)]
+    else:
+        paths = [shortest_path(source, target)]
 
-    if path is None:
+    if not paths or paths[0] is None:
         print("Not connected.")
     else:
-        degrees = len(path)
-        print(f"{degrees} degrees of separation.")
-        path = [(None, source)] + path
-        for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
-            print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+        for number, path in enumerate(paths):
+            if number > 0:
+                print()
+            print_path(source, path)
+
+
+def add_load_arguments(parser):
+    """
+    Adds the --compact and --cache options of load_data to an
+    argparse parser.
+    """
+    parser.add_argument("--compact", action="store_true",
+                        help="store credits in a compact int graph to save memory")
+    parser.add_argument("--cache", action="store_true",
+                        help="load the compact graph from a snapshot file, building it if needed")
+
+
+def print_path(source, path):
+    """
+    Prints the degrees of separation and every step of a path from source.
+    """
+    degrees = len(path)
+    print(f"{degrees} degrees of separation.")
+    path = [(None, source)] + path
+    for i in range(degrees):
+        person1 = people[path[i][1]]["name"]
+        person2 = people[path[i + 1][1]]["name"]
+        movie = movies[path[i + 1][0]]["title"]
+        print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=True):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    Searches from both ends by default, set bidirectional to False
+    to run a one-sided BFS from source instead.
+
     If no possible path, returns None.
     """
     
@@ -96,10 +399,340 @@ def shortest_path(source, target):
     if source == target:
         return None
 
+    # repeated queries, in either direction, skip the search entirely
+    generation = path_cache.generation
+    found, path = path_cache.get(source, target)
+    if found:
+        return path
+
+    search = bidirectional_search if bidirectional else breadth_first_search
+    path = run_search(source, target, search)
+    path_cache.put(source, target, path, generation)
+    return path
+
+
+def alt_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs that connect
+    source to target using A* guided by landmark lower bounds (ALT).
+
+    Requires build_landmarks to have been called. If no possible path,
+    returns None.
+    """
+    if source == target:
+        return None
+    return run_search(source, target, alt_search, use_landmarks=True)
+
+
+def loaded_data():
+    """
+    Returns tuple of (graph, components, landmarks) for the loaded data,
+    where graph is the CompactGraph or a DictGraph over people and movies.
+
+    They are read together so that a search never mixes the versions
+    before and after an apply_delta.
+    """
+    with data_lock:
+        search_graph = graph if graph is not None else DictGraph(people, movies)
+        return search_graph, components, landmarks
+
+
+def run_search(source, target, search, use_landmarks=False):
+    """
+    Runs search(source, target, graph) against the loaded data, passing
+    the landmark index as well with use_landmarks, and returns its path
+    as (movie_id, person_id) pairs.
+    """
+    search_graph, component_index, landmark_index = loaded_data()
+
+    # people in different components are never connected, skip the search
+    if component_index is not None and not component_index.connected(source, target):
+        return None
+
+    # compact graphs are searched on interned ints, converting the path back to ids
+    args = (search_graph.state(source), search_graph.state(target), search_graph)
+    if use_landmarks:
+        if landmark_index is None:
+            raise Exception("landmarks are not built")
+        args += (landmark_index,)
+    path = search(*args)
+    return None if path is None else search_graph.to_ids(path)
+
+
+def build_landmarks(count=8):
+    """
+    Builds the landmark index from the count people with the most movies.
+    """
+    global landmarks
+    search_graph, component_index, _ = loaded_data()
+    if isinstance(search_graph, DictGraph):
+        degree = {person_id: len(person["movies"]) for person_id, person in search_graph.people.items()}
+        landmark_index = LandmarkIndex.build(degree, count, search_graph, component_index.index)
+    else:
+        degree = {person: len(search_graph.movies_of(person))
+                  for person in range(len(search_graph.person_ids))}
+        landmark_index = LandmarkIndex.build(degree, count, search_graph)
+
+    with data_lock:
+        landmarks = landmark_index
+
+
+def estimated_degrees(source, target):
+    """
+    Returns tuple of (lower, upper) bounds on the degrees of separation
+    between two person_ids without searching, upper is None when unknown.
+
+    Returns None if they are not connected.
+    """
+    search_graph, component_index, landmark_index = loaded_data()
+    if landmark_index is None:
+        raise Exception("landmarks are not built")
+    if source == target:
+        return 0, 0
+    if component_index is not None and not component_index.connected(source, target):
+        return None
+
+    bounds = landmark_index.bounds(search_graph.state(source), search_graph.state(target))
+    if bounds is None:
+        return None
+    # different people are at least one degree apart
+    lower, upper = bounds
+    return max(lower, 1), upper
+
+
+def shortest_paths_from(source, targets):
+    """
+    Returns a dict mapping each of targets to its shortest path from
+    source, or None if not connected, answering all of them from one
+    BFS tree grown from source.
+    """
+    search_graph, component_index, _ = loaded_data()
+
+    # only grow the tree towards targets in the same component as source
+    paths = {target: None for target in targets}
+    if component_index is not None:
+        targets = {target for target in targets if component_index.connected(source, target)}
+
+    # grow the tree on search states and convert each path back to ids
+    state = search_graph.state
+    tree = bfs_tree(state(source), {state(target) for target in targets}, search_graph)
+    for target in targets:
+        path = tree_path(tree, state(target))
+        paths[target] = None if path is None else search_graph.to_ids(path)
+    return paths
+
+
+def all_shortest_paths(source, target):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs that
+    connect the source to the target, yields nothing if there is none.
+
+    The BFS layers are recorded once and paths are generated lazily from
+    them, so only the path being yielded is ever held in memory.
+    """
+    layers = loaded_path_layers(source, target)
+    if layers is None:
+        return
+    search_graph, source, target, person_parents, movie_parents = layers
+    for path in layered_paths(source, target, person_parents, movie_parents):
+        yield search_graph.to_ids(path)
+
+
+def ranked_shortest_paths(source, target, k, key=None):
+    """
+    Returns up to k shortest paths from source to target, ranked by key,
+    a function of a path that defaults to newest_movies_key.
+
+    The default ranking grows paths best first and stops after k of them.
+    Any other key ranks every shortest path, and there may be
+    exponentially many of those.
+    """
+    if key is not None:
+        return heapq.nsmallest(k, all_shortest_paths(source, target), key=key)
+    return newest_shortest_paths(source, target, k)
+
+
+def newest_movies_key(path):
+    """
+    Ranks paths whose oldest movie is the most recent first.
+    """
+    return -min(movie_year(movie_id) for movie_id, _ in path)
+
+
+def movie_year(movie_id):
+    year = movies[movie_id]["year"]
+    return int(year) if year.isdigit() else 0
+
+
+def newest_shortest_paths(source, target, k):
+    """
+    Returns up to k shortest paths from source to target ranked by
+    newest_movies_key, growing them back from target best first.
+
+    The oldest movie of a path can only get older as it grows, so once k
+    paths reached source no partial path left could rank above them. Of
+    equally ranked partial paths the longest grows first, so ties, like
+    movies of the same year, are followed down to source one at a time.
+    """
+    layers = loaded_path_layers(source, target)
+    if layers is None or k <= 0:
+        return []
+    search_graph, source, target, person_parents, movie_parents = layers
+
+    years = {}
+    # entries are (key so far, -length, tie-breaker, person, path from person to target reversed)
+    heap = [(-math.inf, 0, 0, target, [])]
+    count = itertools.count(1)
+    paths = []
+    while heap and len(paths) < k:
+        key, _, _, person, path = heapq.heappop(heap)
+        if person == source:
+            paths.append(search_graph.to_ids(path[::-1]))
+            continue
+        for movie in person_parents[person]:
+            if movie not in years:
+                years[movie] = movie_year(search_graph.to_ids([(movie, person)])[0][0])
+            movie_key = max(key, -years[movie])
+            for parent in movie_parents[movie]:
+                heapq.heappush(heap, (movie_key, -len(path) - 1, next(count), parent,
+                                      path + [(movie, person)]))
+    return paths
+
+
+def loaded_path_layers(source, target):
+    """
+    Returns tuple of (graph, source state, target state, person_parents,
+    movie_parents) of the BFS layers from source to target in the loaded
+    data, or None if they are the same person or not connected.
+    """
+    if source == target:
+        return None
+    search_graph, component_index, _ = loaded_data()
+    if component_index is not None and not component_index.connected(source, target):
+        return None
+
+    source, target = search_graph.state(source), search_graph.state(target)
+    layers = shortest_path_layers(source, target, search_graph)
+    if layers is None:
+        return None
+    return (search_graph, source, target) + layers
+
+
+def shortest_path_layers(source, target, graph):
+    """
+    Runs a BFS over graph from source that stops after the layer of
+    target, recording every way each person and movie is first reached.
+
+    Returns tuple of (person_parents, movie_parents), mapping a person to
+    the movies that reach it from the previous layer and a movie to the
+    people of the previous layer starring in it, or None if target is
+    not reached.
+    """
+    person_depth = {source: 0}
+    movie_depth = {}
+    person_parents = {}
+    movie_parents = {}
+    layer = [source]
+    depth = 0
+
+    while layer and target not in person_depth:
+        depth += 1
+        next_layer = []
+        for person in layer:
+            for movie in graph.movies_of(person):
+                if movie in movie_depth:
+                    # the cast was scanned already, only note another way in
+                    if movie_depth[movie] == depth:
+                        movie_parents[movie].append(person)
+                    continue
+
+                movie_depth[movie] = depth
+                movie_parents[movie] = [person]
+                for star in graph.stars_of(movie):
+                    if star not in person_depth:
+                        person_depth[star] = depth
+                        person_parents[star] = [movie]
+                        next_layer.append(star)
+                    elif person_depth[star] == depth:
+                        person_parents[star].append(movie)
+        layer = next_layer
+
+    if target not in person_depth:
+        return None
+    return person_parents, movie_parents
+
+
+def layered_paths(source, person, person_parents, movie_parents):
+    """
+    Yields every path from source to person through the recorded layers.
+    """
+    if person == source:
+        yield []
+        return
+    for movie in person_parents[person]:
+        for parent in movie_parents[movie]:
+            for path in layered_paths(source, parent, person_parents, movie_parents):
+                path.append((movie, person))
+                yield path
+
+
+def bfs_tree(source, targets, graph):
+    """
+    Returns a dict mapping people reached by a BFS over graph from source
+    to the (movie, parent) step that reaches them, source itself maps to None.
+
+    The search stops early once every person in targets is reached,
+    with targets None it covers the whole component of source.
+    """
+    tree = {source: None}
+    seen_movies = set()
+    remaining = set() if targets is None else set(targets)
+    remaining.discard(source)
+    layer = [source]
+
+    while layer and (remaining or targets is None):
+        next_layer = []
+        for person in layer:
+            for (movie, neighbor) in unseen_neighbors(graph, person, seen_movies):
+                if neighbor not in tree:
+                    tree[neighbor] = (movie, person)
+                    remaining.discard(neighbor)
+                    next_layer.append(neighbor)
+        layer = next_layer
+
+    return tree
+
+
+def tree_path(tree, target):
+    """
+    Returns the path from the root of a BFS tree to target,
+    or None if target was not reached (or is the root itself).
+    """
+    if tree.get(target) is None:
+        return None
+
+    path = []
+    person = target
+    while tree[person] is not None:
+        movie, parent = tree[person]
+        path.append((movie, person))
+        person = parent
+    path.reverse()
+    return path
+
+
+def breadth_first_search(source, target, graph):
+    """
+    Returns the shortest path from source to target found by a BFS
+    over graph that only grows from source, or None if they are not connected.
+    """
+
     # keep track of visited node
     visited = set()
+    # movies are expanded once, later co-stars through them are never closer
+    seen_movies = set()
     # use queue frontier for bfs
-    frontier = QueueFrontier()
+    frontier = DequeQueueFrontier()
     frontier.add(Node(state=source, parent=None, action=None))
 
     # apply BFS while frontier is not empty (still have nodes that are not yet explored)
@@ -109,7 +742,7 @@ def shortest_path(source, target):
         visited.add(curr_node.state)
 
         # if target is not reached, check neighbors
-        for (movie_id, person_id) in neighbors_for_person(curr_node.state):
+        for (movie_id, person_id) in unseen_neighbors(graph, curr_node.state, seen_movies):
             # only add neighbors that are not visited and not already in frontier
             if (person_id not in visited) and (not frontier.contains_state(person_id)):
                 new_node = Node(state=person_id, parent=curr_node, action=movie_id)
@@ -132,6 +765,138 @@ def shortest_path(source, target):
     return None
 
 
+def bidirectional_search(source, target, graph):
+    """
+    Returns the shortest path from source to target found by growing
+    BFS frontiers over graph from both ends until they meet, or None if
+    they are not connected.
+    """
+
+    # map each reached person to its node, one map per search direction
+    forward = {source: Node(state=source, parent=None, action=None)}
+    backward = {target: Node(state=target, parent=None, action=None)}
+    forward_movies = set()
+    backward_movies = set()
+    forward_layer = [forward[source]]
+    backward_layer = [backward[target]]
+
+    # stop once either side runs out of people to expand
+    while forward_layer and backward_layer:
+        # always expand the smaller frontier, it is the cheaper one to grow
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer, meeting = expand_layer(forward_layer, forward, backward,
+                                                  forward_movies, graph)
+        else:
+            backward_layer, meeting = expand_layer(backward_layer, backward, forward,
+                                                   backward_movies, graph)
+
+        # both searches reached the same person, join the two halves
+        if meeting is not None:
+            return join_paths(forward[meeting], backward[meeting])
+
+    return None
+
+
+def expand_layer(layer, reached, other_reached, seen_movies, graph):
+    """
+    Expands every node of a BFS layer, recording new people in reached
+    and expanded movies in seen_movies.
+
+    Returns tuple of (next layer, meeting person) where meeting person
+    is the first new person already reached by the other search, or None.
+    """
+    next_layer = []
+    for node in layer:
+        for (movie_id, person_id) in unseen_neighbors(graph, node.state, seen_movies):
+            if person_id in reached:
+                continue
+            new_node = Node(state=person_id, parent=node, action=movie_id)
+            reached[person_id] = new_node
+
+            # the layers never overlapped before, so the first meeting is a shortest path
+            if person_id in other_reached:
+                return next_layer, person_id
+            next_layer.append(new_node)
+
+    return next_layer, None
+
+
+def alt_search(source, target, graph, landmark_index):
+    """
+    Returns the shortest path from source to target found by A* over graph
+    using landmark lower bounds as heuristic, or None if they are not connected.
+    """
+    heuristic = landmark_index.lower_bound(target)
+    nodes = {source: Node(state=source, parent=None, action=None)}
+    cost = {source: 0}
+    expanded = set()
+    # cost of the person each movie was expanded from
+    movie_cost = {}
+    # frontier entries are (estimate, -cost, tie breaker, person),
+    # ties go to the deeper person as it is closer to target
+    tie_breaker = itertools.count()
+    frontier = [(heuristic(source), 0, next(tie_breaker), source)]
+
+    while frontier:
+        _, _, _, person = heapq.heappop(frontier)
+        # landmark bounds are consistent, so target is final once popped
+        if person == target:
+            return trace_path(nodes[target])
+        if person in expanded:
+            continue
+        expanded.add(person)
+
+        new_cost = cost[person] + 1
+        for movie in graph.movies_of(person):
+            # A* does not expand in cost order, so only skip movies already
+            # expanded from a person at most as far from source
+            if movie_cost.get(movie, new_cost) < new_cost:
+                continue
+            movie_cost[movie] = cost[person]
+
+            for neighbor in graph.stars_of(movie):
+                if neighbor not in cost or new_cost < cost[neighbor]:
+                    cost[neighbor] = new_cost
+                    nodes[neighbor] = Node(state=neighbor, parent=nodes[person], action=movie)
+                    heapq.heappush(
+                        frontier,
+                        (new_cost + heuristic(neighbor), -new_cost, next(tie_breaker), neighbor)
+                    )
+
+    return None
+
+
+def trace_path(node):
+    """
+    Returns the list of (movie, person) pairs leading from the root of
+    a search to node.
+    """
+    path = []
+    while node.parent is not None:
+        path.append((node.action, node.state))
+        node = node.parent
+    path.reverse()
+    return path
+
+
+def join_paths(forward_node, backward_node):
+    """
+    Joins the forward search path ending at a meeting person with the
+    backward search path starting from it into a single
+    list of (movie_id, person_id) pairs.
+    """
+    # traceback from the meeting person to source
+    path = trace_path(forward_node)
+
+    # walk from the meeting person to target, each parent is one step closer
+    node = backward_node
+    while node.parent is not None:
+        path.append((node.action, node.parent.state))
+        node = node.parent
+
+    return path
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
@@ -158,11 +923,66 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def loaded_names():
+    """
+    Returns tuple of (name_index, names) of the same version of the data,
+    building the index first if the names were loaded some other way.
+    """
+    global name_index
+    with data_lock:
+        index, known_names = name_index, names
+    if index is None:
+        index = NameIndex(known_names)
+        with data_lock:
+            # publish it unless apply_delta swapped the names meanwhile
+            if names is known_names:
+                name_index = index
+    return index, known_names
+
+
+def search_names(query, limit=10):
+    """
+    Returns up to limit (person_id, score) pairs for people whose name
+    starts with or resembles query, best matches first.
+    """
+    # apply_delta may swap both at any time, so read them once
+    index, known_names = loaded_names()
+
+    results = []
+    for name, score in index.search(query, limit):
+        for person_id in sorted(known_names.get(name, set())):
+            results.append((person_id, score))
+    return results[:limit]
+
+
+def not_found_message(name):
+    """
+    Returns the message for a name without exact match, with suggestions.
+    """
+    suggestions = [people[person_id]["name"] for person_id, _ in search_names(name, limit=5)]
+    if not suggestions:
+        return "Person not found."
+    return f"Person not found. Did you mean: {', '.join(dict.fromkeys(suggestions))}?"
+
+
+def person_ids_for_query(query):
+    """
+    Returns the sorted list of person_ids matching a query,
+    which is either a person_id or a name.
+    """
+    if query in people:
+        return [query]
+    return sorted(names.get(query.lower(), set()))
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph_neighbors(person_id)
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -171,5 +991,15 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+def graph_neighbors(person_id):
+    """
+    Yields (movie_id, person_id) pairs from the compact graph.
+    """
+    compact_graph = graph
+    person = compact_graph.person_index[person_id]
+    for movie, star in compact_graph.neighbors(person):
+        yield compact_graph.movie_ids[movie], compact_graph.person_ids[star]
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,257 @@
+import copy
+from array import array
+
+
+class CompactGraph():
+    """
+    Person-movie bipartite graph with IMDB ids interned to dense ints.
+
+    Edges are stored in CSR form: the movies of person p are
+    person_movies[person_offsets[p]:person_offsets[p + 1]] and the
+    stars of movie m are movie_people[movie_offsets[m]:movie_offsets[m + 1]].
+    """
+    def __init__(self, person_ids, movie_ids, person_offsets, person_movies,
+                 movie_offsets, movie_people):
+        # map dense ints back to IMDB ids and the other way around
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        self.person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        self.movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+        # memoryviews so that slicing a row does not copy it
+        self.person_offsets = memoryview(person_offsets)
+        self.person_movies = memoryview(person_movies)
+        self.movie_offsets = memoryview(movie_offsets)
+        self.movie_people = memoryview(movie_people)
+
+        # credits added by with_delta, layered on top of the CSR arrays
+        self.csr_people = len(self.person_offsets) - 1
+        self.csr_movies = len(self.movie_offsets) - 1
+        self.extra_movies = {}
+        self.extra_stars = {}
+
+    def movies_of(self, person):
+        """
+        Returns the movies a person (as int) starred in, a view into
+        the CSR arrays unless credits were added for that person.
+        """
+        extra = self.extra_movies.get(person)
+        if person >= self.csr_people:
+            return extra or ()
+        offsets = self.person_offsets
+        movies = self.person_movies[offsets[person]:offsets[person + 1]]
+        return movies if extra is None else list(movies) + extra
+
+    def stars_of(self, movie):
+        """
+        Returns the people who starred in a movie (as int), a view into
+        the CSR arrays unless credits were added for that movie.
+        """
+        extra = self.extra_stars.get(movie)
+        if movie >= self.csr_movies:
+            return extra or ()
+        offsets = self.movie_offsets
+        stars = self.movie_people[offsets[movie]:offsets[movie + 1]]
+        return stars if extra is None else list(stars) + extra
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) int pairs for people who starred with a
+        given person, including the person itself.
+        """
+        for movie in self.movies_of(person):
+            for star in self.stars_of(movie):
+                yield movie, star
+
+    def state(self, person_id):
+        """
+        Returns the int searches use for a person_id.
+        """
+        return self.person_index[person_id]
+
+    def person_id(self, person):
+        """
+        Returns the person_id of a search state.
+        """
+        return self.person_ids[person]
+
+    def with_delta(self, person_ids, movie_ids, credits):
+        """
+        Returns a new graph sharing this graph's arrays, with new people,
+        movies and (person_id, movie_id) credits layered on top. This
+        graph is left unchanged for searches still running on it.
+
+        Returns tuple of (graph, movies (as int) that gained credits,
+        number of credits skipped for an unknown person or movie).
+        """
+        updated = copy.copy(self)
+        updated.person_ids = self.person_ids + [
+            person_id for person_id in dict.fromkeys(person_ids) if person_id not in self.person_index
+        ]
+        updated.movie_ids = self.movie_ids + [
+            movie_id for movie_id in dict.fromkeys(movie_ids) if movie_id not in self.movie_index
+        ]
+        updated.person_index = dict(self.person_index)
+        for i in range(len(self.person_ids), len(updated.person_ids)):
+            updated.person_index[updated.person_ids[i]] = i
+        updated.movie_index = dict(self.movie_index)
+        for i in range(len(self.movie_ids), len(updated.movie_ids)):
+            updated.movie_index[updated.movie_ids[i]] = i
+
+        # extra rows are replaced, never appended to, as the old graph shares them
+        updated.extra_movies = dict(self.extra_movies)
+        updated.extra_stars = dict(self.extra_stars)
+        touched = set()
+        skipped = 0
+        for person_id, movie_id in credits:
+            person = updated.person_index.get(person_id)
+            movie = updated.movie_index.get(movie_id)
+            if person is None or movie is None:
+                skipped += 1
+                continue
+            if movie in updated.movies_of(person):
+                continue
+            updated.extra_movies[person] = updated.extra_movies.get(person, []) + [movie]
+            updated.extra_stars[movie] = updated.extra_stars.get(movie, []) + [person]
+            touched.add(movie)
+
+        return updated, touched, skipped
+
+    def to_ids(self, path):
+        """
+        Converts a list of (movie, person) int pairs to IMDB ids.
+        """
+        return [(self.movie_ids[movie], self.person_ids[person]) for movie, person in path]
+
+
+class DictGraph():
+    """
+    Gives the people and movies dicts of degrees.py the same
+    movies_of / stars_of interface as CompactGraph, keyed by IMDB ids.
+    """
+    def __init__(self, people, movies):
+        self.people = people
+        self.movies = movies
+
+    def movies_of(self, person_id):
+        return self.people[person_id]["movies"]
+
+    def stars_of(self, movie_id):
+        return self.movies[movie_id]["stars"]
+
+    def state(self, person_id):
+        return person_id
+
+    def person_id(self, person):
+        return person
+
+    def to_ids(self, path):
+        return path
+
+
+def unseen_neighbors(graph, person, seen_movies):
+    """
+    Yields (movie, person) pairs for the movies of person not in
+    seen_movies, adding them to it.
+
+    A search sharing one seen_movies set scans each movie's cast at most
+    once, which keeps its cost linear in the number of credits.
+    """
+    for movie in graph.movies_of(person):
+        if movie in seen_movies:
+            continue
+        seen_movies.add(movie)
+        for star in graph.stars_of(movie):
+            yield movie, star
+
+
+class GraphBuilder():
+    """
+    Collects people, movies and credits while data is read, then packs
+    them into a CompactGraph.
+    """
+    def __init__(self):
+        self.person_ids = []
+        self.movie_ids = []
+        self.person_index = {}
+        self.movie_index = {}
+        # credits as parallel arrays of interned person and movie ints
+        self.credit_people = array("i")
+        self.credit_movies = array("i")
+
+    def add_person(self, person_id):
+        if person_id not in self.person_index:
+            self.person_index[person_id] = len(self.person_ids)
+            self.person_ids.append(person_id)
+
+    def add_movie(self, movie_id):
+        if movie_id not in self.movie_index:
+            self.movie_index[movie_id] = len(self.movie_ids)
+            self.movie_ids.append(movie_id)
+
+    def add_star(self, person_id, movie_id):
+        """
+        Records a credit, returns False if either id is unknown.
+        """
+        person = self.person_index.get(person_id)
+        movie = self.movie_index.get(movie_id)
+        if person is None or movie is None:
+            return False
+        self.credit_people.append(person)
+        self.credit_movies.append(movie)
+        return True
+
+    def build(self):
+        # group credits by person, dropping duplicated credits
+        person_offsets, person_movies = build_csr(
+            self.credit_people, self.credit_movies, len(self.person_ids), unique=True
+        )
+
+        # transpose into movie rows, which are already free of duplicates
+        credit_people = array("i")
+        for person in range(len(self.person_ids)):
+            credit_people.extend([person] * (person_offsets[person + 1] - person_offsets[person]))
+        movie_offsets, movie_people = build_csr(
+            person_movies, credit_people, len(self.movie_ids)
+        )
+
+        return CompactGraph(self.person_ids, self.movie_ids, person_offsets,
+                            person_movies, movie_offsets, movie_people)
+
+
+def build_csr(rows, columns, num_rows, unique=False):
+    """
+    Returns (offsets, indices) arrays grouping columns by their row
+    using a counting sort. With unique, duplicated entries of a row
+    are dropped and each row is sorted.
+    """
+    # count entries per row, then prefix sum into offsets
+    offsets = array("i", bytes(4 * (num_rows + 1)))
+    for row in rows:
+        offsets[row + 1] += 1
+    for row in range(num_rows):
+        offsets[row + 1] += offsets[row]
+
+    # place each entry at the next free slot of its row
+    indices = array("i", bytes(4 * len(rows)))
+    positions = offsets[:-1]
+    for row, column in zip(rows, columns):
+        indices[positions[row]] = column
+        positions[row] += 1
+
+    if not unique:
+        return offsets, indices
+
+    # compact every row in place, keeping one copy of each entry
+    size = 0
+    start = 0
+    for row in range(num_rows):
+        end = offsets[row + 1]
+        row_indices = sorted(set(indices[start:end]))
+        indices[size:size + len(row_indices)] = array("i", row_indices)
+        start = end
+        size += len(row_indices)
+        offsets[row + 1] = size
+    del indices[size:]
+
+    return offsets, indices
@@ -0,0 +1,107 @@
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from util import fork_context
+
+# interned ids used by parse_range, set in each worker by init_worker
+person_index = {}
+movie_index = {}
+
+
+def init_worker(people, movies):
+    global person_index, movie_index
+    person_index = people
+    movie_index = movies
+
+
+def byte_ranges(filename, parts):
+    """
+    Splits a file into parts contiguous (start, end) byte ranges.
+    """
+    size = os.path.getsize(filename)
+    step = max(1, -(-size // parts))
+    return [(start, min(start + step, size)) for start in range(0, size, step)]
+
+
+def parse_range(filename, start, end, columns):
+    """
+    Parses the stars.csv lines starting inside [start, end) into interned
+    person and movie ints.
+
+    columns gives the positions of person_id and movie_id in a row.
+    Returns tuple of (people bytes, movies bytes, skipped rows) where
+    skipped rows are credits of an unknown person or movie, or rows too
+    short to hold both.
+    """
+    person_column, movie_column = columns
+    credit_people = array("i")
+    credit_movies = array("i")
+    skipped = 0
+
+    with open(filename, "rb") as f:
+        # a line cut by start belongs to the previous range, the header to none
+        if start > 0:
+            f.seek(start - 1)
+        f.readline()
+
+        position = f.tell()
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+
+            line = line.rstrip(b"\r\n")
+            # blank lines are no rows, like csv.DictReader reads them
+            if not line:
+                continue
+            row = line.split(b",")
+            if len(row) <= max(person_column, movie_column):
+                skipped += 1
+                continue
+            person = person_index.get(row[person_column].strip(b'"').decode("utf-8"))
+            movie = movie_index.get(row[movie_column].strip(b'"').decode("utf-8"))
+            if person is None or movie is None:
+                skipped += 1
+                continue
+            credit_people.append(person)
+            credit_movies.append(movie)
+
+    return credit_people.tobytes(), credit_movies.tobytes(), skipped
+
+
+def load_stars(filename, builder, workers=1):
+    """
+    Adds the credits of stars.csv to a GraphBuilder, parsing byte ranges
+    of the file in a pool of workers processes.
+
+    Returns the number of rows skipped for an unknown person or movie or
+    for being too short.
+    """
+    with open(filename, "rb") as f:
+        header = f.readline().rstrip(b"\r\n").split(b",")
+    header = [column.strip(b'"') for column in header]
+    columns = (header.index(b"person_id"), header.index(b"movie_id"))
+
+    ranges = byte_ranges(filename, workers)
+    if not ranges:
+        return 0
+    if workers <= 1:
+        init_worker(builder.person_index, builder.movie_index)
+        chunks = [parse_range(filename, start, end, columns) for start, end in ranges]
+    else:
+        # forked workers inherit the interned ids instead of pickling them
+        with ProcessPoolExecutor(max_workers=workers, mp_context=fork_context(),
+                                 initializer=init_worker,
+                                 initargs=(builder.person_index, builder.movie_index)) as pool:
+            chunks = list(pool.map(parse_range, [filename] * len(ranges),
+                                   *zip(*ranges), [columns] * len(ranges)))
+
+    # merge the chunks in file order straight into the builder's arrays
+    skipped = 0
+    for credit_people, credit_movies, chunk_skipped in chunks:
+        builder.credit_people.frombytes(credit_people)
+        builder.credit_movies.frombytes(credit_movies)
+        skipped += chunk_skipped
+    return skipped
@@ -0,0 +1,146 @@
+from array import array
+from collections import deque
+
+from graph import unseen_neighbors
+
+# distance stored for people a landmark cannot reach
+UNREACHABLE = -1
+
+
+class LandmarkIndex():
+    """
+    BFS distances from a few well connected people (landmarks), giving
+    triangle-inequality bounds on the degrees between any two people.
+
+    People are looked up by the dense ints of index, which maps the
+    search states to positions in the distance arrays.
+    """
+    def __init__(self, landmarks, distances, index):
+        self.landmarks = landmarks
+        self.distances = distances
+        self.index = index
+
+    @classmethod
+    def build(cls, candidates, count, graph, index=None):
+        """
+        Picks count landmarks among candidates, a dict of state to degree,
+        and runs a BFS over graph from each of them.
+
+        index maps states to dense ints, None when states already are ints.
+        """
+        # the best connected people sit close to most others
+        landmarks = sorted(candidates, key=candidates.get, reverse=True)[:count]
+        distances = [bfs_distances(landmark, graph, index, len(candidates))
+                     for landmark in landmarks]
+        return cls(landmarks, distances, index)
+
+    def updated(self, graph, movies, index, size):
+        """
+        Returns a copy of the index after credits were added to movies of
+        graph, with index and size covering any new people.
+
+        Adding credits only shortens distances, so they are lowered from
+        those movies outwards instead of rerunning every BFS.
+        """
+        updated = LandmarkIndex(self.landmarks, [], index)
+        for distance in self.distances:
+            distance = array("h", distance)
+            distance.extend([UNREACHABLE] * (size - len(distance)))
+            lower_distances(distance, graph, movies, updated.key)
+            updated.distances.append(distance)
+        return updated
+
+    def key(self, state):
+        return state if self.index is None else self.index[state]
+
+    def bounds(self, source, target):
+        """
+        Returns tuple of (lower, upper) bounds on the degrees between two
+        states in O(K). upper is None if no landmark reaches both, and
+        the result is None if the landmarks prove they are not connected.
+        """
+        source, target = self.key(source), self.key(target)
+        lower, upper = 0, None
+        for distance in self.distances:
+            to_source, to_target = distance[source], distance[target]
+            if to_source == UNREACHABLE and to_target == UNREACHABLE:
+                continue
+            # a landmark reaching only one of them lies in exactly one component
+            if to_source == UNREACHABLE or to_target == UNREACHABLE:
+                return None
+            lower = max(lower, abs(to_source - to_target))
+            if upper is None or to_source + to_target < upper:
+                upper = to_source + to_target
+        return lower, upper
+
+    def lower_bound(self, target):
+        """
+        Returns a heuristic function giving, for a state, a lower bound
+        on its degrees to target, usable by A*.
+        """
+        target_distances = [(distance, distance[self.key(target)]) for distance in self.distances]
+        key = self.key
+
+        def heuristic(state):
+            state = key(state)
+            bound = 0
+            for distance, to_target in target_distances:
+                to_state = distance[state]
+                if to_state != UNREACHABLE and to_target != UNREACHABLE:
+                    bound = max(bound, abs(to_state - to_target))
+            return bound
+
+        return heuristic
+
+
+def bfs_distances(source, graph, index, size):
+    """
+    Returns an array of the degrees from source to every person,
+    UNREACHABLE for people in another component.
+    """
+    distances = array("h", [UNREACHABLE]) * size
+    distances[source if index is None else index[source]] = 0
+    seen_movies = set()
+    layer = [source]
+    depth = 0
+
+    while layer:
+        depth += 1
+        next_layer = []
+        for person in layer:
+            for (_, neighbor) in unseen_neighbors(graph, person, seen_movies):
+                key = neighbor if index is None else index[neighbor]
+                if distances[key] == UNREACHABLE:
+                    distances[key] = depth
+                    next_layer.append(neighbor)
+        layer = next_layer
+
+    return distances
+
+
+def lower_distances(distances, graph, movies, key):
+    """
+    Lowers distances after credits were added to movies, propagating
+    every shortened distance through the graph.
+    """
+    queue = deque()
+    for movie in movies:
+        stars = graph.stars_of(movie)
+        reached = [distances[key(star)] for star in stars if distances[key(star)] != UNREACHABLE]
+        if not reached:
+            continue
+        # the movie now links its whole cast to its closest star
+        depth = min(reached) + 1
+        for star in stars:
+            if distances[key(star)] == UNREACHABLE or distances[key(star)] > depth:
+                distances[key(star)] = depth
+                queue.append(star)
+
+    while queue:
+        person = queue.popleft()
+        depth = distances[key(person)] + 1
+        for movie in graph.movies_of(person):
+            for star in graph.stars_of(movie):
+                if distances[key(star)] == UNREACHABLE or distances[key(star)] > depth:
+                    distances[key(star)] = depth
+                    queue.append(star)
@@ -0,0 +1,126 @@
+import math
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+# fuzzy matches sharing fewer trigrams than this (Jaccard) are dropped
+MIN_SIMILARITY = 0.3
+
+# trigrams of more than this fraction of the names (and COMMON_MIN names)
+# are never scanned for fuzzy candidates, only looked up for the candidates
+# found through rarer trigrams
+COMMON_FRACTION = 0.01
+COMMON_MIN = 1000
+
+
+class NameIndex():
+    """
+    Index over lowercased names answering prefix lookups from a sorted
+    array and typo tolerant lookups from a trigram index.
+    """
+    def __init__(self, names):
+        # sorted names, a prefix matches a contiguous run of them
+        self.names = sorted(names)
+
+        # trigram -> positions in self.names of the names containing it, ascending
+        self.grams = {}
+        # number of trigrams of each name
+        self.sizes = array("i")
+        for position, name in enumerate(self.names):
+            name_grams = trigrams(name)
+            self.sizes.append(len(name_grams))
+            for gram in name_grams:
+                postings = self.grams.get(gram)
+                if postings is None:
+                    postings = self.grams[gram] = array("i")
+                postings.append(position)
+        self.common = max(COMMON_MIN, int(COMMON_FRACTION * len(self.names)))
+
+    def prefix(self, query, limit):
+        """
+        Returns up to limit names starting with query, in sorted order.
+        """
+        query = query.lower()
+        matches = []
+        position = bisect_left(self.names, query)
+        while position < len(self.names) and len(matches) < limit:
+            name = self.names[position]
+            if not name.startswith(query):
+                break
+            matches.append(name)
+            position += 1
+        return matches
+
+    def fuzzy(self, query, limit):
+        """
+        Returns up to limit (name, similarity) pairs ranked by the trigram
+        Jaccard similarity of name and query.
+
+        A name similar enough shares at least needed trigrams with query,
+        so it holds one of the rarest len(query trigrams) - needed + 1 of
+        them. Only the postings of those are scanned, skipping common ones,
+        and the other trigrams are looked up for the candidates found.
+        Names sharing nothing but common trigrams with query are missed.
+        """
+        query_grams = trigrams(query.lower())
+        size = len(query_grams)
+        needed = max(1, math.ceil(MIN_SIMILARITY * size))
+        postings = sorted((self.grams.get(gram, array("i")) for gram in query_grams), key=len)
+        scanned, checked = [], []
+        for i, posting in enumerate(postings):
+            if i == 0 or (i <= size - needed and len(posting) <= self.common):
+                scanned.append(posting)
+            else:
+                checked.append(posting)
+
+        shared = Counter()
+        for posting in scanned:
+            shared.update(posting)
+
+        matches = []
+        # the Jaccard similarity bounds the trigram count of a match
+        smallest, largest = needed, size / MIN_SIMILARITY
+        for position, count in shared.items():
+            name_size = self.sizes[position]
+            if not smallest <= name_size <= largest:
+                continue
+            count += sum(contains(posting, position) for posting in checked)
+            similarity = count / (size + name_size - count)
+            if similarity >= MIN_SIMILARITY:
+                matches.append((self.names[position], similarity))
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches[:limit]
+
+    def search(self, query, limit=10):
+        """
+        Returns up to limit (name, score) pairs for a query. Exact and
+        prefix matches come first, then fuzzy matches fill the rest.
+        """
+        query = query.lower().strip()
+        results = {}
+        for name in self.prefix(query, limit):
+            results[name] = 1.0 if name == query else 0.9
+        if len(results) < limit:
+            for name, similarity in self.fuzzy(query, limit):
+                # scale fuzzy scores below every prefix match
+                results.setdefault(name, round(0.8 * similarity, 3))
+
+        ranked = sorted(results.items(), key=lambda result: (-result[1], result[0]))
+        return ranked[:limit]
+
+
+def contains(postings, position):
+    """
+    Returns True if the ascending postings hold position.
+    """
+    i = bisect_left(postings, position)
+    return i < len(postings) and postings[i] == position
+
+
+def trigrams(name):
+    """
+    Returns the set of 3 character substrings of a name, padded so that
+    its start and end form trigrams too.
+    """
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
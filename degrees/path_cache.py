@@ -0,0 +1,75 @@
+import threading
+from collections import OrderedDict
+
+
+class PathCache():
+    """
+    Bounded LRU cache of shortest paths keyed by the unordered pair of
+    people, a path cached one way also answers the flipped query.
+    """
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # bumped by clear so that searches started before it cannot store stale paths
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def get(self, source, target):
+        """
+        Returns tuple of (found, path) for the path from source to target.
+        """
+        key = pair_key(source, target)
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return False, None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            path = self.entries[key]
+
+        # paths are stored from the first person of the key
+        if path is None:
+            return True, None
+        if source != key[0]:
+            return True, reverse_path(key[0], path)
+        return True, list(path)
+
+    def put(self, source, target, path, generation):
+        """
+        Stores the path from source to target found while the cache was at
+        generation, dropping the least recently used path when full.
+        """
+        key = pair_key(source, target)
+        if path is not None and source != key[0]:
+            path = reverse_path(source, path)
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.entries[key] = path
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.generation += 1
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "size": len(self.entries), "capacity": self.capacity}
+
+
+def pair_key(source, target):
+    return (source, target) if source <= target else (target, source)
+
+
+def reverse_path(source, path):
+    """
+    Returns the path from the last person of path back to source.
+    """
+    people = [source] + [person_id for _, person_id in path]
+    return [(movie_id, people[i]) for i, (movie_id, _) in reversed(list(enumerate(path)))]
@@ -0,0 +1,153 @@
+import argparse
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import degrees
+
+
+class PooledHTTPServer(HTTPServer):
+    """
+    HTTP server handing each connection to a fixed pool of worker threads.
+    """
+    def __init__(self, address, handler, workers):
+        super().__init__(address, handler)
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    Answers GET /path?source=...&target=... with the shortest path between
+    two people, given by person_id or name, and GET /search?q=...&limit=...
+    with ranked name matches, as JSON. GET /stats reports path cache counters.
+    """
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/path":
+            self.answer_path(query)
+        elif url.path == "/search":
+            self.answer_search(query)
+        elif url.path == "/stats":
+            self.send_json(200, {"path_cache": degrees.path_cache.stats()})
+        else:
+            self.send_json(404, {"error": "unknown endpoint"})
+
+    def answer_search(self, query):
+        if "q" not in query:
+            self.send_json(400, {"error": "q is required"})
+            return
+        try:
+            limit = int(query.get("limit", ["10"])[0])
+        except ValueError:
+            self.send_json(400, {"error": "limit must be an int"})
+            return
+
+        results = [
+            dict(person_json(person_id), score=score)
+            for person_id, score in degrees.search_names(query["q"][0], limit)
+        ]
+        self.send_json(200, {"query": query["q"][0], "results": results})
+
+    def answer_path(self, query):
+        if "source" not in query or "target" not in query:
+            self.send_json(400, {"error": "source and target are required"})
+            return
+
+        # resolve both people, names may match several person_ids
+        person_ids = []
+        for query_key in ("source", "target"):
+            matches = degrees.person_ids_for_query(query[query_key][0])
+            if len(matches) == 0:
+                self.send_json(404, {"error": f"{query_key} not found"})
+                return
+            if len(matches) > 1:
+                self.send_json(409, {
+                    "error": f"{query_key} is ambiguous",
+                    "candidates": [person_json(person_id) for person_id in matches]
+                })
+                return
+            person_ids.append(matches[0])
+
+        source, target = person_ids
+        self.send_json(200, path_json(source, target, degrees.shortest_path(source, target)))
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # keep the console quiet, thousands of queries a day would flood it
+        pass
+
+
+def person_json(person_id):
+    person = degrees.people[person_id]
+    return {"id": person_id, "name": person["name"], "birth": person["birth"]}
+
+
+def path_json(source, target, path):
+    """
+    Returns the JSON body for a path found by degrees.shortest_path.
+    """
+    if path is None:
+        return {"source": person_json(source), "target": person_json(target),
+                "degrees": None, "path": None}
+    return {
+        "source": person_json(source),
+        "target": person_json(target),
+        "degrees": len(path),
+        "path": [
+            {"movie_id": movie_id, "title": degrees.movies[movie_id]["title"],
+             "person": person_json(person_id)}
+            for movie_id, person_id in path
+        ]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve degrees of separation queries over HTTP.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--workers", type=int, default=8)
+    degrees.add_load_arguments(parser)
+    args = parser.parse_args()
+
+    # Load data once, every query reuses it
+    print("Loading data...")
+    degrees.load_data(args.directory, compact=args.compact, cache=args.cache)
+    print("Data loaded.")
+
+    server = PooledHTTPServer((args.host, args.port), QueryHandler, args.workers)
+    print(f"Serving on http://{args.host}:{args.port}/path?source=...&target=...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from graph import CompactGraph
+
+MAGIC = b"DEGSNAP" + (b"L" if sys.byteorder == "little" else b"B")
+VERSION = 1
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# magic, version, (mtime_ns, size) of every source CSV,
+# number of people, movies and credits, size of the string table
+HEADER = struct.Struct("<8sI6qIIII")
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, "degrees.snapshot")
+
+
+def source_stamp(directory):
+    """
+    Returns the (mtime_ns, size) pairs of the source CSVs, flattened.
+    """
+    stamp = []
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        stamp.extend((stat.st_mtime_ns, stat.st_size))
+    return stamp
+
+
+def save_snapshot(directory, graph, people, movies, stamp):
+    """
+    Writes a loaded compact graph and its metadata to the snapshot file
+    of directory.
+
+    stamp is the source_stamp of directory taken before the CSVs were
+    read, so a CSV changed during the load leaves the snapshot stale.
+    """
+    # strings are stored as one NUL separated table, people first then movies
+    strings = list(graph.person_ids)
+    strings.extend(people[person_id]["name"] for person_id in graph.person_ids)
+    strings.extend(people[person_id]["birth"] for person_id in graph.person_ids)
+    strings.extend(graph.movie_ids)
+    strings.extend(movies[movie_id]["title"] for movie_id in graph.movie_ids)
+    strings.extend(movies[movie_id]["year"] for movie_id in graph.movie_ids)
+    table = "\0".join(strings).encode("utf-8")
+
+    header = HEADER.pack(
+        MAGIC, VERSION, *stamp,
+        len(graph.person_ids), len(graph.movie_ids), len(graph.person_movies), len(table)
+    )
+
+    # write to a temporary file first so readers never see a partial snapshot
+    path = snapshot_path(directory)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        for section in (graph.person_offsets, graph.person_movies,
+                        graph.movie_offsets, graph.movie_people):
+            f.write(section)
+        f.write(table)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(directory):
+    """
+    Memory-maps the snapshot of directory.
+
+    Returns tuple of (graph, people, movies, names), or None if there is
+    no snapshot or it is older than the source CSVs.
+    """
+    path = snapshot_path(directory)
+    try:
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(data) < HEADER.size:
+        return None
+    magic, version, *fields = HEADER.unpack_from(data)
+    stamp, (num_people, num_movies, num_credits, table_size) = fields[:6], fields[6:]
+    if magic != MAGIC or version != VERSION or stamp != source_stamp(directory):
+        return None
+
+    # slice the int sections straight out of the mapping without copying
+    view = memoryview(data)
+    position = HEADER.size
+    sections = []
+    for length in (num_people + 1, num_credits, num_movies + 1, num_credits):
+        size = length * array("i").itemsize
+        # a header disagreeing with the file length means a broken snapshot
+        if position + size > len(data):
+            return None
+        sections.append(view[position:position + size].cast("i"))
+        position += size
+    if position + table_size != len(data):
+        return None
+
+    strings = bytes(view[position:]).decode("utf-8").split("\0")
+    person_ids = strings[:num_people]
+    person_names = strings[num_people:2 * num_people]
+    births = strings[2 * num_people:3 * num_people]
+    movie_ids = strings[3 * num_people:3 * num_people + num_movies]
+    titles = strings[3 * num_people + num_movies:3 * num_people + 2 * num_movies]
+    years = strings[3 * num_people + 2 * num_movies:]
+
+    graph = CompactGraph(person_ids, movie_ids, *sections)
+
+    # rebuild the metadata dicts the rest of degrees.py reads
+    people = {}
+    names = {}
+    for person_id, name, birth in zip(person_ids, person_names, births):
+        people[person_id] = {"name": name, "birth": birth}
+        names.setdefault(name.lower(), set()).add(person_id)
+    movies = {
+        movie_id: {"title": title, "year": year}
+        for movie_id, title, year in zip(movie_ids, titles, years)
+    }
+
+    return graph, people, movies, names
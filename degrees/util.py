@@ -1,3 +1,16 @@
+import multiprocessing
+from collections import deque
+
+
+def fork_context():
+    """
+    Returns the multiprocessing context of process pools, fork where the
+    platform has it so that workers inherit the loaded data.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("fork" if "fork" in methods else None)
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -36,3 +49,48 @@ class QueueFrontier(StackFrontier):
             node = self.frontier[0]
             self.frontier = self.frontier[1:]
             return node
+
+
+class DequeStackFrontier():
+    """
+    Stack frontier backed by a deque, keeping count of the states it holds
+    so that add, remove and contains_state all run in constant time.
+    """
+    def __init__(self):
+        self.frontier = deque()
+        self.states = {}
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.pop()
+            self.forget(node.state)
+            return node
+
+    def pop(self):
+        return self.frontier.pop()
+
+    def forget(self, state):
+        # the same state may have been added more than once
+        count = self.states[state] - 1
+        if count == 0:
+            del self.states[state]
+        else:
+            self.states[state] = count
+
+
+class DequeQueueFrontier(DequeStackFrontier):
+
+    def pop(self):
+        return self.frontier.popleft()
@@ -0,0 +1,301 @@
+"""
+Tests for degrees.py on the small dataset
+
+Make sure that this file is in the same directory as degrees.py!
+
+Every test loads the data it needs, and the loaded data of degrees_test.py
+is put back afterwards.
+"""
+import csv
+import heapq
+import json
+import os
+import shutil
+
+import pytest as pt
+
+import batch
+import benchmark
+import degrees
+from degrees import (all_shortest_paths, alt_shortest_path, apply_delta, build_landmarks,
+                     estimated_degrees, load_data, neighbors_for_person, newest_movies_key,
+                     ranked_shortest_paths, search_names, shortest_path)
+from name_index import NameIndex, trigrams
+from snapshot import HEADER, load_snapshot, snapshot_path
+
+SMALL = "small"
+
+# module globals of degrees.py that load_data and apply_delta replace
+STATE = ("people", "movies", "names", "graph", "components", "landmarks", "name_index")
+
+
+@pt.fixture(autouse=True)
+def restore_data():
+    saved = {name: getattr(degrees, name) for name in STATE}
+    yield
+    for name, value in saved.items():
+        setattr(degrees, name, value)
+    degrees.path_cache.clear()
+
+
+@pt.mark.parametrize("compact", [False, True])
+def test_apply_delta(tmp_path, compact):
+    # a delta onto part of the data must answer like loading all of it
+    base, delta, merged = split_small(tmp_path)
+
+    load_data(merged, compact=compact)
+    build_landmarks(count=len(degrees.people))
+    expected = answers()
+
+    load_data(base, compact=compact)
+    # every base person is a landmark, so the bounds are exact on both sides
+    build_landmarks(count=len(degrees.people))
+    assert apply_delta(delta) == 0
+    assert answers() == expected
+
+
+def test_stale_snapshot(tmp_path):
+    # a snapshot is used until a source CSV changes, then rebuilt
+    directory = str(tmp_path / "small")
+    shutil.copytree(SMALL, directory)
+    assert load_data(directory, cache=True) == 0
+    assert load_data(directory, cache=True) is None
+    expected = shortest_path("102", "914612")
+
+    stars = os.path.join(directory, "stars.csv")
+    stat = os.stat(stars)
+    os.utime(stars, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert load_snapshot(directory) is None
+    assert load_data(directory, cache=True) == 0
+    assert load_data(directory, cache=True) is None
+    assert shortest_path("102", "914612") == expected
+
+    # a snapshot cut short inside its first section is ignored
+    with open(snapshot_path(directory), "r+b") as f:
+        f.truncate(HEADER.size + 6)
+    assert load_snapshot(directory) is None
+
+
+def test_compact_backend():
+    # the compact graph must find the same paths and neighbors as the dicts
+    load_data(SMALL)
+    expected = backend_answers()
+    load_data(SMALL, compact=True)
+    assert backend_answers() == expected
+
+
+@pt.mark.parametrize("compact", [False, True])
+def test_alt_search(compact):
+    # ALT must find shortest paths and the landmark bounds must hold
+    load_data(SMALL, compact=compact)
+    build_landmarks(count=2)
+    for source in sorted(degrees.people):
+        for target in sorted(degrees.people):
+            if source == target:
+                continue
+            path = shortest_path(source, target, bidirectional=False)
+            alt_path = alt_shortest_path(source, target)
+            if path is None:
+                assert alt_path is None
+                assert estimated_degrees(source, target) is None
+                continue
+            assert len(alt_path) == len(path)
+            lower, upper = estimated_degrees(source, target)
+            assert lower <= len(path)
+            assert upper is None or len(path) <= upper
+
+
+def test_parallel_ingest(tmp_path):
+    # parsing stars.csv in several workers must build the graph of one
+    directory = str(tmp_path / "small")
+    shutil.copytree(SMALL, directory)
+    with open(os.path.join(directory, "stars.csv"), "a", encoding="utf-8") as f:
+        f.write("102\n\n999999,104257\n")
+
+    skipped = load_data(directory, compact=True)
+    expected = compact_arrays()
+    assert skipped == 2
+    assert load_data(directory, compact=True, workers=3) == skipped
+    assert compact_arrays() == expected
+    # the dict backend skips the same rows
+    assert load_data(directory) == skipped
+
+
+def test_batch_answers():
+    # batch answers, grouped by source, must match shortest_path one by one
+    load_data(SMALL)
+    ids = sorted(degrees.people)
+    pairs = [(source, target) for source in ids for target in ids if source != target]
+    groups, errors = batch.group_pairs(pairs + [("Kevin Bacon", "Nobody")])
+    assert errors == [{"source": "Kevin Bacon", "target": "Nobody", "error": "target not found"}]
+    assert sum(len(queries) for queries in groups.values()) == len(pairs)
+
+    for group in groups.items():
+        for line in batch.answer_group(group):
+            answer = json.loads(line)
+            path = shortest_path(answer["source"], answer["target"])
+            assert answer["degrees"] == (None if path is None else len(path))
+            if path is not None:
+                assert answer["path"][-1][1] == answer["target"]
+
+
+@pt.mark.parametrize("compact", [False, True])
+def test_ranked_shortest_paths(compact):
+    # the best-first ranking must keep the paths ranking every path keeps
+    load_data(SMALL, compact=compact)
+    for source in sorted(degrees.people):
+        for target in sorted(degrees.people):
+            paths = list(all_shortest_paths(source, target))
+            for k in (1, 2, len(paths) + 1):
+                ranked = ranked_shortest_paths(source, target, k)
+                expected = heapq.nsmallest(k, paths, key=newest_movies_key)
+                assert [newest_movies_key(path) for path in ranked] == \
+                    [newest_movies_key(path) for path in expected]
+                assert all(path in paths for path in ranked)
+
+
+def test_ranked_paths_same_year(tmp_path, monkeypatch):
+    # with every movie from one year, the first path is found without
+    # growing the 6 ** 6 others
+    directory = layered_data(tmp_path, width=6, depth=6)
+    load_data(directory)
+    pushes = []
+    push = heapq.heappush
+    monkeypatch.setattr(heapq, "heappush", lambda heap, item: pushes.append(item) or push(heap, item))
+
+    paths = ranked_shortest_paths("S", "T", 1)
+    assert len(paths) == 1 and len(paths[0]) == 7
+    assert len(pushes) <= 6 * 7
+
+
+def test_name_index():
+    # the index is built with the data and finds names despite typos
+    load_data(SMALL)
+    assert degrees.name_index is not None
+    assert search_names("Kevn Bacon")[0][0] == "102"
+
+    # common trigrams are not scanned but still count for the candidates
+    index = NameIndex([f"person {i}" for i in range(10000)])
+    assert len(index.grams["per"]) > index.common
+    query, name = trigrams("persn 1234"), trigrams("person 1234")
+    assert index.fuzzy("persn 1234", 1) == [("person 1234", len(query & name) / len(query | name))]
+
+
+def test_benchmark_pairs(tmp_path):
+    # both backends must time the same queries for reports to be comparable
+    directory = str(tmp_path / "synthetic")
+    benchmark.generate(directory, 5000)
+    load_data(directory)
+    expected = benchmark.pick_pairs(len(degrees.people))
+    load_data(directory, compact=True)
+    assert benchmark.pick_pairs(len(degrees.people)) == expected
+
+
+# Helper functions
+
+
+def answers():
+    """
+    Returns the path length, connectivity and estimated degrees of every
+    pair of loaded people.
+    """
+    results = {}
+    for source in sorted(degrees.people):
+        for target in sorted(degrees.people):
+            if source == target:
+                continue
+            path = shortest_path(source, target)
+            results[source, target] = (
+                None if path is None else len(path),
+                degrees.components.connected(source, target),
+                estimated_degrees(source, target)
+            )
+    return results
+
+
+def backend_answers():
+    """
+    Returns the path length between every pair of loaded people and the
+    neighbor pairs of each of them.
+    """
+    lengths = {}
+    neighbors = {}
+    for source in sorted(degrees.people):
+        neighbors[source] = set(neighbors_for_person(source))
+        for target in sorted(degrees.people):
+            path = shortest_path(source, target)
+            lengths[source, target] = None if path is None else len(path)
+    return lengths, neighbors
+
+
+def compact_arrays():
+    """
+    Returns the ids and CSR arrays of the loaded CompactGraph.
+    """
+    graph = degrees.graph
+    return (graph.person_ids, graph.movie_ids,
+            bytes(graph.person_offsets), bytes(graph.person_movies),
+            bytes(graph.movie_offsets), bytes(graph.movie_people))
+
+
+def layered_data(directory, width, depth):
+    """
+    Writes a dataset where S reaches T through depth layers of width
+    people, every person of a layer starring with all of the next one
+    and every movie from the year 2000.
+
+    Returns the directory of the dataset.
+    """
+    layers = [["S"]] + [[f"{i}-{j}" for j in range(width)] for i in range(depth)] + [["T"]]
+    people = [{"id": person, "name": f"Person {person}", "birth": ""}
+              for layer in layers for person in layer]
+    movies = [{"id": f"M{i}", "title": f"Movie {i}", "year": "2000"} for i in range(depth + 1)]
+    stars = [{"person_id": person, "movie_id": f"M{i}"}
+             for i in range(depth + 1) for person in layers[i] + layers[i + 1]]
+
+    path = directory / "layered"
+    path.mkdir()
+    for filename, rows in (("people.csv", people), ("movies.csv", movies), ("stars.csv", stars)):
+        write_rows(path / filename, rows)
+    return str(path)
+
+
+def split_small(directory):
+    """
+    Writes the small dataset plus a new person and movie as a base, a
+    delta holding the last credits and the new rows, and both merged.
+
+    Returns the (base, delta, merged) directories.
+    """
+    people, movies, stars = (read_rows(os.path.join(SMALL, filename))
+                             for filename in ("people.csv", "movies.csv", "stars.csv"))
+    new_person = [{"id": "999", "name": "Delta Person", "birth": "2000"}]
+    new_movie = [{"id": "888", "title": "Delta Movie", "year": "2020"}]
+    new_stars = stars[-6:] + [{"person_id": "999", "movie_id": "888"},
+                              {"person_id": "102", "movie_id": "888"}]
+
+    directories = []
+    for name, files in (
+        ("base", {"people.csv": people, "movies.csv": movies, "stars.csv": stars[:-6]}),
+        ("delta", {"people.csv": new_person, "movies.csv": new_movie, "stars.csv": new_stars}),
+        ("merged", {"people.csv": people + new_person, "movies.csv": movies + new_movie,
+                    "stars.csv": stars[:-6] + new_stars}),
+    ):
+        path = directory / name
+        path.mkdir()
+        for filename, rows in files.items():
+            write_rows(path / filename, rows)
+        directories.append(str(path))
+    return directories
+
+
+def read_rows(filename):
+    with open(filename, encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def write_rows(filename, rows):
+    with open(filename, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
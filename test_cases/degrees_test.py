@@ -6,7 +6,7 @@ Make sure that this file is in the same directory as degrees.py!
 'Why do we fall sir? So that we can learn to pick ourselves up.'
                                         - Batman Begins (2005)
 """
-from degrees import load_data, person_id_for_name, shortest_path
+from degrees import all_shortest_paths, load_data, path_cache, person_id_for_name, shortest_path
 
 load_data("large")
 
@@ -65,4 +65,33 @@ def test_six_degree():
 def test_eight_degree():
     source = person_id_for_name("Juliane Banse")
     target = person_id_for_name("Julian Acosta")
-    assert len(shortest_path(source, target)) == 8
\ No newline at end of file
+    assert len(shortest_path(source, target)) == 8
+
+
+def test_one_sided_search():
+    source = person_id_for_name("Emma Watson")
+    target = person_id_for_name("Jennifer Lawrence")
+    path_cache.clear()
+    assert len(shortest_path(source, target, bidirectional=False)) == 3
+
+
+def test_cached_reverse_path():
+    source = person_id_for_name("Emma Watson")
+    target = person_id_for_name("Jennifer Lawrence")
+    # start cold so the forward call searches and the reverse one hits
+    path_cache.clear()
+    path = shortest_path(source, target)
+    hits = path_cache.stats()["hits"]
+    reverse = shortest_path(target, source)
+    assert path_cache.stats()["hits"] == hits + 1
+    assert len(reverse) == 3
+    assert reverse[-1][1] == source
+    assert [movie_id for movie_id, _ in reverse] == [movie_id for movie_id, _ in reversed(path)]
+
+
+def test_all_shortest_paths():
+    source = person_id_for_name("Tom Cruise")
+    target = person_id_for_name("Tom Hanks")
+    paths = list(all_shortest_paths(source, target))
+    assert len(paths) > 1
+    assert all(len(path) == 2 for path in paths)
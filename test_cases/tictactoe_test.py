@@ -6,8 +6,16 @@ Make sure that this file is in the same directory as tictactoe.py!
 'Why do we fall sir? So that we can learn to pick ourselves up.'
                                         - Batman Begins (2005)
 """
+import threading
+
 import pytest as pt
 
+import bitboard
+import engine
+import mcts
+import parallel
+import stats
+import table
 import tictactoe as ttt
 
 # Let the AI play against itself for 10 times. If the minimax function
@@ -19,6 +27,140 @@ def test(execution_number):
     return play_ai_vs_ai()
 
 
+def test_symmetric_boards():
+    # every rotation of a position must get the rotated blocking move,
+    # whether it comes from the perfect-play table or the search
+    board = [[ttt.X, ttt.X, ttt.EMPTY],
+             [ttt.EMPTY, ttt.O, ttt.EMPTY],
+             [ttt.EMPTY, ttt.EMPTY, ttt.EMPTY]]
+    block = (0, 2)
+    for _ in range(4):
+        assert ttt.minimax(board) == block
+        board = [list(row) for row in zip(*board[::-1])]
+        block = (block[1], 2 - block[0])
+
+
+def test_perfect_play_table():
+    # every precomputed move must keep the value the search finds
+    entries = table.load()
+    assert entries is not None, "run table.py to build the perfect-play table"
+    for x in range(bitboard.FULL + 1):
+        for o in range(bitboard.FULL + 1):
+            if x & o or entries[table.index(x, o)] == table.UNKNOWN:
+                continue
+            cell, value = table.decode(entries[table.index(x, o)])
+            assert ttt.solve(x, o)[1] == value
+            if cell is not None:
+                board = ttt.result(bitboard.to_board(x, o), divmod(cell, 3))
+                assert ttt.solve(*bitboard.from_board(board))[1] == value
+
+
+def test_larger_board():
+    # X completes 4 in a row on a 4x4 board within the time budget
+    board = ttt.initial_state(4, 4)
+    for j, cell in enumerate([ttt.X, ttt.X, ttt.X, ttt.EMPTY]):
+        board[1][j] = cell
+    board[3][0] = board[3][2] = board[0][3] = ttt.O
+    assert ttt.player(board) == ttt.X
+    assert ttt.minimax(board, time_limit=1.0) == (1, 3)
+    assert ttt.winner(ttt.result(board, (1, 3))) == ttt.X
+
+
+def test_win_length():
+    # a 3x3 board played to 2 in a row is won by X's second stone
+    board = ttt.initial_state()
+    board[0][0] = ttt.X
+    board[2][2] = ttt.O
+    action = ttt.minimax(board, k=2)
+    assert ttt.winner(ttt.result(board, action), k=2) == ttt.X
+    assert ttt.terminal(ttt.result(board, action), k=2)
+    # the classic game is left alone
+    assert ttt.winner(ttt.result(board, action)) is None
+
+
+def test_move_ordering():
+    # ordered search must agree with plain alpha-beta on fewer nodes
+    rules = bitboard.Rules(3, 3, 3)
+    plain = engine.Engine(rules, ordering=False)
+    ordered = engine.Engine(rules)
+    assert plain.search(0, 0, time_limit=None)[1] == ordered.search(0, 0, time_limit=None)[1] == 0
+    assert ordered.nodes < plain.nodes
+
+
+def test_stop_search():
+    # a set stop event ends a search without a time limit at once
+    stop = threading.Event()
+    stop.set()
+    board = ttt.initial_state(7, 7)
+    assert ttt.minimax(board, time_limit=None, stop=stop) in ttt.actions(board)
+    assert ttt.engines[7, 7, 5].nodes <= engine.CLOCK_INTERVAL
+
+
+def test_parallel_search():
+    # splitting the root over processes must not change the move
+    rules = bitboard.Rules(4, 4, 4)
+    sequential = engine.Engine(rules).search(0, 0, time_limit=None, max_depth=4)
+    assert parallel.search(rules, 0, 0, time_limit=None, max_depth=4, workers=2) == sequential
+    # the next search of the game, even with new Rules, reuses the pool and its tables
+    pool = parallel.pools[4, 4, 4][0]
+    rules = bitboard.Rules(4, 4, 4)
+    assert parallel.search(rules, 0, 0, time_limit=None, max_depth=4, workers=2) == sequential
+    assert list(parallel.pools) == [(4, 4, 4)] and parallel.pools[4, 4, 4][0] is pool
+    parallel.shutdown()
+    assert not parallel.pools
+
+
+def test_mcts():
+    # MCTS must win at once rather than block, and never lose to perfect play
+    player = mcts.MCTSPlayer(iterations=2000, time_limit=None, seed=0)
+    board = [[ttt.X, ttt.O, ttt.EMPTY],
+             [ttt.X, ttt.O, ttt.EMPTY],
+             [ttt.EMPTY, ttt.EMPTY, ttt.EMPTY]]
+    assert player.move(board) == (2, 0)
+
+    board = ttt.initial_state()
+    while not ttt.terminal(board):
+        move = player.move(board) if ttt.player(board) == ttt.X else ttt.minimax(board)
+        board = ttt.result(board, move)
+    assert ttt.winner(board) is None
+
+
+def test_batch_evaluation():
+    # the vectorized rules must agree with tictactoe.py on every board
+    pt.importorskip("numpy")
+    import batch
+
+    entries = table.load()
+    indices = [index for index in range(table.SIZE) if entries[index] != table.UNKNOWN]
+    boards = [bitboard.to_board(*index_masks(index)) for index in indices]
+    winners, terminal, utilities, legal = batch.evaluate(batch.from_boards(boards))
+    assert (batch.encode(batch.from_boards(boards)) == indices).all()
+    assert (batch.decode(indices) == batch.from_boards(boards)).all()
+
+    codes = {ttt.X: batch.X_CODE, ttt.O: batch.O_CODE, None: batch.EMPTY_CODE}
+    for i, board in enumerate(boards):
+        assert winners[i] == codes[ttt.winner(board)]
+        assert terminal[i] == bool(ttt.terminal(board))
+        assert utilities[i] == ttt.utility(board)
+        moves = set() if ttt.terminal(board) else ttt.actions(board)
+        assert {(row, col) for row, col in zip(*legal[i].nonzero())} == moves
+
+
+def test_search_stats():
+    # stats of a 4x4 game add up over its moves
+    game_stats = stats.GameStats()
+    board = ttt.initial_state(4, 4)
+    for _ in range(2):
+        move, move_stats = ttt.minimax_with_stats(board, game_stats, time_limit=0.2)
+        assert move_stats.nodes > 0 and move_stats.branching_factor > 1
+        board = ttt.result(board, move)
+
+    total = game_stats.total()
+    assert total.nodes == sum(move_stats.nodes for move_stats in game_stats.moves)
+    assert sum(total.cutoffs.values()) > 0
+    assert ttt.collector is None
+
+
 # Helper function
 
 
@@ -31,4 +173,18 @@ def play_ai_vs_ai():
         board = ttt.result(board, move)
         game_over = ttt.terminal(board)
 
-    assert ttt.winner(board) is None
\ No newline at end of file
+    assert ttt.winner(board) is None
+
+
+def index_masks(index):
+    """
+    Returns the (x, o) masks of a base-3 board index.
+    """
+    x = o = 0
+    for cell in range(9):
+        index, digit = divmod(index, 3)
+        if digit == 1:
+            x |= 1 << cell
+        elif digit == 2:
+            o |= 1 << cell
+    return x, o
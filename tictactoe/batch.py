@@ -0,0 +1,101 @@
+"""
+Vectorized Tic Tac Toe rules for many 3x3 boards at once
+
+Boards are int8 arrays of shape (N, 3, 3) holding X_CODE, O_CODE or
+EMPTY_CODE, or (N,) arrays of base-3 board indices as used by table.py.
+Every function handles all N boards in one NumPy pass instead of N calls
+to the functions of tictactoe.py.
+"""
+import numpy as np
+
+import bitboard
+import tictactoe as ttt
+
+EMPTY_CODE = 0
+X_CODE = 1
+O_CODE = -1
+
+# cell numbers of the 8 lines, shape (8, 3)
+LINE_CELLS = np.array([list(bitboard.cells(line)) for line in bitboard.LINES])
+
+# base-3 digit of each cell and the code it stands for in table.py indices
+POWERS = 3 ** np.arange(9)
+DIGIT_CODES = np.array([EMPTY_CODE, X_CODE, O_CODE], dtype=np.int8)
+
+
+def from_boards(boards):
+    """
+    Returns the (N, 3, 3) array of a list of list-of-lists boards.
+    """
+    codes = {ttt.EMPTY: EMPTY_CODE, ttt.X: X_CODE, ttt.O: O_CODE}
+    return np.array([[[codes[cell] for cell in row] for row in board] for board in boards],
+                    dtype=np.int8).reshape(-1, 3, 3)
+
+
+def decode(indices):
+    """
+    Returns the (N, 3, 3) array of an array of base-3 board indices.
+    """
+    digits = np.asarray(indices, dtype=np.int64)[:, None] // POWERS % 3
+    return DIGIT_CODES[digits].reshape(-1, 3, 3)
+
+
+def encode(boards):
+    """
+    Returns the base-3 board indices of an (N, 3, 3) array.
+    """
+    cells = as_array(boards).reshape(-1, 9)
+    digits = np.where(cells == O_CODE, 2, cells).astype(np.int64)
+    return digits @ POWERS
+
+
+def as_array(boards):
+    """
+    Returns boards as an (N, 3, 3) int8 array, decoding board indices.
+    """
+    boards = np.asarray(boards)
+    if boards.ndim == 1:
+        return decode(boards)
+    return boards.astype(np.int8, copy=False).reshape(-1, 3, 3)
+
+
+def evaluate(boards):
+    """
+    Returns tuple of (winners, terminal, utilities, legal) for N boards:
+
+    winners    (N,) int8, X_CODE or O_CODE for the winner, EMPTY_CODE if none
+    terminal   (N,) bool, True where the game is over
+    utilities  (N,) int8, 1 if X has won, -1 if O has won, 0 otherwise
+    legal      (N, 3, 3) bool, the empty cells of boards still in play
+    """
+    cells = as_array(boards).reshape(-1, 9)
+
+    # a line summing to 3 is full of X, to -3 full of O
+    sums = cells[:, LINE_CELLS].sum(axis=2, dtype=np.int8)
+    x_wins = (sums == 3 * X_CODE).any(axis=1)
+    o_wins = (sums == 3 * O_CODE).any(axis=1)
+    # X is checked first like tictactoe.winner does
+    winners = np.where(x_wins, X_CODE, np.where(o_wins, O_CODE, EMPTY_CODE)).astype(np.int8)
+
+    empty = cells == EMPTY_CODE
+    terminal = (winners != EMPTY_CODE) | ~empty.any(axis=1)
+    # X_CODE and O_CODE double as the utilities of X and O winning
+    utilities = winners.copy()
+    legal = (empty & ~terminal[:, None]).reshape(-1, 3, 3)
+    return winners, terminal, utilities, legal
+
+
+def winners(boards):
+    return evaluate(boards)[0]
+
+
+def terminals(boards):
+    return evaluate(boards)[1]
+
+
+def utilities(boards):
+    return evaluate(boards)[2]
+
+
+def legal_moves(boards):
+    return evaluate(boards)[3]
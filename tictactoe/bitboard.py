@@ -0,0 +1,221 @@
+"""
+Bitboard engine for Tic Tac Toe
+
+A position is a pair of int masks (x, o), one per player, where bit
+i * cols + j is set when the player holds cell (i, j). The module level
+tables serve the 3x3 game, Rules serves any m,n,k game.
+"""
+
+FULL = (1 << 9) - 1
+
+# Masks of the 3 rows, 3 columns and 2 diagonals
+LINES = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+# The 8 rotations and reflections of the board, as the new cell of each cell
+SYMMETRIES = tuple(
+    tuple(new_i * 3 + new_j for new_i, new_j in (transform(i, j) for i in range(3) for j in range(3)))
+    for transform in (
+        lambda i, j: (i, j),
+        lambda i, j: (j, 2 - i),
+        lambda i, j: (2 - i, 2 - j),
+        lambda i, j: (2 - j, i),
+        lambda i, j: (i, 2 - j),
+        lambda i, j: (2 - i, j),
+        lambda i, j: (j, i),
+        lambda i, j: (2 - j, 2 - i),
+    )
+)
+INVERSES = tuple(
+    tuple(symmetry.index(cell) for cell in range(9)) for symmetry in SYMMETRIES
+)
+
+
+def cells(mask):
+    """
+    Yields the cells set in mask, lowest first.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def transform_mask(mask, symmetry):
+    """
+    Returns mask with each of its cells moved by symmetry.
+    """
+    transformed = 0
+    for cell in cells(mask):
+        transformed |= 1 << symmetry[cell]
+    return transformed
+
+
+# TRANSFORMS[s][mask] is mask moved by the s-th symmetry
+TRANSFORMS = tuple(
+    tuple(transform_mask(mask, symmetry) for mask in range(FULL + 1)) for symmetry in SYMMETRIES
+)
+
+
+def free_cells(x, o):
+    """
+    Yields the empty cells of a position.
+    """
+    return cells(FULL & ~(x | o))
+
+
+def has_line(mask):
+    """
+    Returns True if mask holds a full row, column or diagonal.
+    """
+    for line in LINES:
+        if mask & line == line:
+            return True
+    return False
+
+
+# WINS[mask] is has_line(mask), precomputed for the search
+WINS = tuple(has_line(mask) for mask in range(FULL + 1))
+
+
+def x_to_move(x, o):
+    """
+    Returns True if it is X's turn, X always moves first.
+    """
+    return bin(x).count("1") == bin(o).count("1")
+
+
+def canonical(x, o):
+    """
+    Returns tuple of (key, symmetry) where key is the smallest encoding of
+    the position over its 8 symmetries and symmetry is the index of the
+    one producing it.
+    """
+    best_key, best_symmetry = None, None
+    for symmetry, transforms in enumerate(TRANSFORMS):
+        key = transforms[x] | transforms[o] << 9
+        if best_key is None or key < best_key:
+            best_key, best_symmetry = key, symmetry
+    return best_key, best_symmetry
+
+
+def from_board(board):
+    """
+    Returns tuple of (x, o) masks for a list-of-lists board of any size.
+    """
+    x = o = 0
+    cols = len(board[0])
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == "X":
+                x |= 1 << (i * cols + j)
+            elif cell == "O":
+                o |= 1 << (i * cols + j)
+    return x, o
+
+
+def to_board(x, o, empty=None, rows=3, cols=3):
+    """
+    Returns the list-of-lists board of a position.
+    """
+    return [
+        ["X" if x >> (i * cols + j) & 1 else "O" if o >> (i * cols + j) & 1 else empty
+         for j in range(cols)]
+        for i in range(rows)
+    ]
+
+
+class Rules():
+    """
+    Board size and win length of an m,n,k game: rows x cols cells where
+    k in a row, column or diagonal wins.
+    """
+    # boards with more cells only consider moves near the stones played
+    MAX_FULL_WIDTH_CELLS = 25
+    RADIUS = 2
+
+    def __init__(self, rows, cols, k):
+        if not 1 <= k <= max(rows, cols):
+            raise ValueError(f"cannot get {k} in a row on a {rows}x{cols} board")
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.cells = rows * cols
+        self.full = (1 << self.cells) - 1
+
+        # every window of k cells in a line, in each of the 4 directions
+        lines = []
+        for i in range(rows):
+            for j in range(cols):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if 0 <= end_i < rows and 0 <= end_j < cols:
+                        lines.append(sum(1 << ((i + di * step) * cols + j + dj * step) for step in range(k)))
+        self.lines = tuple(lines)
+        self.lines_through = tuple(
+            tuple(line for line in lines if line >> cell & 1) for cell in range(self.cells)
+        )
+
+        # cells within RADIUS of each cell, None when every empty cell is a candidate
+        self.neighborhoods = None
+        if self.cells > self.MAX_FULL_WIDTH_CELLS:
+            self.neighborhoods = tuple(
+                sum(1 << (i * cols + j)
+                    for i in range(max(0, row - self.RADIUS), min(rows, row + self.RADIUS + 1))
+                    for j in range(max(0, col - self.RADIUS), min(cols, col + self.RADIUS + 1)))
+                for row, col in (divmod(cell, cols) for cell in range(self.cells))
+            )
+
+    def has_line(self, mask):
+        """
+        Returns True if mask holds k in a row anywhere.
+        """
+        for line in self.lines:
+            if mask & line == line:
+                return True
+        return False
+
+    def wins_at(self, mask, cell):
+        """
+        Returns True if mask holds k in a row through cell, cheaper than
+        has_line when cell is the move just played.
+        """
+        for line in self.lines_through[cell]:
+            if mask & line == line:
+                return True
+        return False
+
+    def threats(self, mask, other):
+        """
+        Returns the mask of empty cells that would give mask k in a row,
+        on lines not blocked by other.
+        """
+        threats = 0
+        for line in self.lines:
+            if other & line:
+                continue
+            # the line lacks exactly one cell
+            rest = line ^ (mask & line)
+            if rest and not rest & (rest - 1):
+                threats |= rest
+        return threats
+
+    def candidates(self, x, o):
+        """
+        Returns the mask of cells worth searching in a position.
+        """
+        free = self.full & ~(x | o)
+        if self.neighborhoods is None:
+            return free
+        stones = x | o
+        if not stones:
+            # open in the center
+            return 1 << (self.rows // 2 * self.cols + self.cols // 2)
+        near = 0
+        for cell in cells(stones):
+            near |= self.neighborhoods[cell]
+        # the stones may have filled every cell near them
+        return free & near or free
@@ -0,0 +1,259 @@
+"""
+Anytime search for m,n,k games
+
+Iterative-deepening negamax with alpha-beta pruning over bitboards. Each
+iteration searches one ply deeper than the last, scoring the positions at
+the cutoff depth with a heuristic, until the game is solved, the depth
+limit is reached or the time budget runs out. The move of the deepest
+finished iteration is the answer, so a search can be stopped at any time.
+
+Moves are tried best first, which is what makes alpha-beta prune: a won
+line is taken at once, an opponent's won line must be blocked, then come
+the move the last iteration found best (the principal variation), the
+killer moves that caused cutoffs at the same ply and finally the moves
+ranked by how many cutoffs they caused anywhere (history).
+"""
+import time
+
+import bitboard
+
+# scores of won positions, far above any heuristic score
+WIN = 10 ** 9
+
+# depth, flag and score of transposition table entries
+EXACT = "exact"
+LOWER = "lower"
+UPPER = "upper"
+
+# how many nodes to search between checks of the clock
+CLOCK_INTERVAL = 64
+
+# killer moves remembered per ply
+KILLERS = 2
+
+
+class TimeUp(Exception):
+    """
+    Raised inside a search once its time budget is spent.
+    """
+
+
+class Engine():
+    """
+    Searches positions of one m,n,k game, keeping its transposition table
+    between searches so later moves reuse the work of earlier ones.
+    """
+    # the table is cleared when it grows past this many positions
+    MAX_ENTRIES = 1_000_000
+
+    def __init__(self, rules, ordering=True):
+        self.rules = rules
+        # False searches moves in board order, to measure what ordering saves
+        self.ordering = ordering
+        # maps (mover mask, opponent mask) to (depth, flag, score, cell)
+        self.transpositions = {}
+        self.deadline = None
+        # threading.Event ending the search like the deadline once set, if any
+        self.stop = None
+        # stats.MoveStats collecting details of searches, if any
+        self.stats = None
+
+        # counted over the last search
+        self.nodes = 0
+        self.cutoffs = 0
+
+        # move ordering state of the last search
+        self.root_depth = 0
+        self.killers = {}
+        self.history = [0] * rules.cells
+
+    def search(self, x, o, time_limit=1.0, max_depth=None, report=None):
+        """
+        Returns tuple of (best cell, score, depth) for the player to move,
+        score is from that player's point of view.
+
+        time_limit is in seconds, None searches until max_depth, which
+        defaults to the number of empty cells. report, if given, is called
+        with (depth, cell, score) after each finished iteration.
+        """
+        me, opponent = (x, o) if bitboard.x_to_move(x, o) else (o, x)
+        empty = bin(self.rules.full & ~(x | o)).count("1")
+        max_depth = empty if max_depth is None else min(max_depth, empty)
+        if len(self.transpositions) > self.MAX_ENTRIES:
+            self.transpositions.clear()
+
+        self.deadline = None if time_limit is None else time.perf_counter() + time_limit
+        self.nodes = 0
+        self.cutoffs = 0
+        self.killers = {}
+        self.history = [0] * self.rules.cells
+
+        # fall back on any candidate if not even depth 1 finishes in time
+        best = (next(bitboard.cells(self.rules.candidates(x, o)), None), 0, 0)
+        for depth in range(1, max_depth + 1):
+            self.root_depth = depth
+            try:
+                cell, score = self.search_root(me, opponent, depth, WIN + empty + 1)
+            except TimeUp:
+                break
+            best = (cell, score, depth)
+            if report is not None:
+                report(depth, cell, score)
+            # a forced win or loss will not change with depth
+            if abs(score) >= WIN:
+                break
+        return best
+
+    def search_root(self, me, opponent, depth, bound):
+        """
+        Returns tuple of (best cell, score) of the root position like
+        negamax, but of equally good moves always the first in board
+        order, so the move does not depend on the search order.
+        """
+        rules = self.rules
+        stats = self.stats
+        if stats is not None:
+            stats.start_search()
+            stats.visit()
+        moves = rules.candidates(me, opponent)
+        if self.ordering:
+            wins = rules.threats(me, opponent)
+            if wins:
+                return next(bitboard.cells(wins)), WIN + depth - 1
+            moves = rules.threats(opponent, me) or moves
+
+        entry = self.transpositions.get((me, opponent))
+        best_known = None if entry is None else entry[3]
+        if stats is not None:
+            stats.expand()
+        best_cell = None
+        best_score = alpha = -bound
+        for cell in self.ordered(moves, 0, best_known):
+            # searching just below alpha keeps the scores of ties with it exact
+            _, score = self.negamax(opponent, me | 1 << cell, depth - 1, -bound, 1 - alpha, cell)
+            score = -score
+            if score > best_score or (score == best_score and cell < best_cell):
+                best_cell, best_score = cell, score
+            alpha = max(alpha, score)
+
+        self.transpositions[(me, opponent)] = (depth, EXACT, best_score, best_cell)
+        return best_cell, best_score
+
+    def negamax(self, me, opponent, depth, alpha, beta, last=None):
+        """
+        Returns tuple of (best cell, score) of a position for the player
+        holding me, searched depth plies deep within (alpha, beta).
+        """
+        self.nodes += 1
+        stats = self.stats
+        if stats is not None:
+            stats.visit()
+        if self.nodes % CLOCK_INTERVAL == 0:
+            if self.deadline is not None and time.perf_counter() > self.deadline:
+                raise TimeUp()
+            if self.stop is not None and self.stop.is_set():
+                raise TimeUp()
+
+        rules = self.rules
+        # the opponent just moved, so only they can have won; sooner wins score higher
+        if last is not None and rules.wins_at(opponent, last):
+            return None, -WIN - depth
+        moves = rules.candidates(me, opponent)
+        if not moves:
+            return None, 0
+        if depth == 0:
+            return None, evaluate(rules, me, opponent)
+
+        if self.ordering:
+            # completing a line wins now, scored like the loss the child would find
+            wins = rules.threats(me, opponent)
+            if wins:
+                return next(bitboard.cells(wins)), WIN + depth - 1
+            # any move but a block loses next turn
+            blocks = rules.threats(opponent, me)
+            if blocks:
+                moves = blocks
+
+        # reuse an earlier search at least as deep of the same position
+        key = (me, opponent)
+        entry = self.transpositions.get(key)
+        best_known = None
+        if entry is not None:
+            entry_depth, flag, score, cell = entry
+            if entry_depth >= depth and (
+                    flag == EXACT or (flag == LOWER and score >= beta) or (flag == UPPER and score <= alpha)):
+                if stats is not None:
+                    stats.transposition_hit()
+                return cell, score
+            best_known = cell
+        alpha_orig = alpha
+
+        if stats is not None:
+            stats.expand()
+        ply = self.root_depth - depth
+        best_cell = None
+        best_score = -WIN - depth - 1
+        for cell in self.ordered(moves, ply, best_known):
+            _, score = self.negamax(opponent, me | 1 << cell, depth - 1, -beta, -alpha, cell)
+            score = -score
+            if score > best_score:
+                best_cell, best_score = cell, score
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                self.cutoffs += 1
+                if stats is not None:
+                    stats.cutoff(depth)
+                self.remember_cutoff(cell, ply, depth)
+                break
+
+        if best_score <= alpha_orig:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.transpositions[key] = (depth, flag, best_score, best_cell)
+        return best_cell, best_score
+
+    def ordered(self, moves, ply, best_known):
+        """
+        Returns the cells of moves in the order to search them: the best
+        known move first, then the killers of ply, then by history.
+        """
+        cells = list(bitboard.cells(moves))
+        if not self.ordering:
+            return cells
+        killers = self.killers.get(ply, ())
+        history = self.history
+        cells.sort(key=lambda cell: (cell != best_known, cell not in killers, -history[cell]))
+        return cells
+
+    def remember_cutoff(self, cell, ply, depth):
+        """
+        Records a move that caused a cutoff at ply with depth plies left.
+        """
+        killers = self.killers.setdefault(ply, [])
+        if cell not in killers:
+            killers.insert(0, cell)
+            del killers[KILLERS:]
+        # cutoffs far from the leaves prune bigger subtrees
+        self.history[cell] += depth * depth
+
+
+def evaluate(rules, me, opponent):
+    """
+    Returns a heuristic score of a position for the player holding me.
+
+    Every line window still open to only one player counts for that
+    player, more so the more of its k cells they already hold.
+    """
+    score = 0
+    for line in rules.lines:
+        mine = me & line
+        theirs = opponent & line
+        if mine and not theirs:
+            score += 10 ** bin(mine).count("1")
+        elif theirs and not mine:
+            score -= 10 ** bin(theirs).count("1")
+    # long lines on big boards must still rank below a real win
+    return max(-WIN + 1, min(WIN - 1, score))
@@ -0,0 +1,167 @@
+"""
+Monte Carlo Tree Search player for Tic Tac Toe boards of any size
+
+Grows a game tree one node per iteration: UCT picks the path down the
+tree, a random playout on bitboards scores the new leaf and the result is
+backed up to the root. The more iterations it gets, the stronger it
+plays, so it suits boards that minimax cannot search to the end.
+"""
+import math
+import random
+import time
+
+import bitboard
+import tictactoe as ttt
+
+
+class Node():
+    """
+    A position in the search tree, reached by the player who played cell.
+    """
+    __slots__ = ("x", "o", "cell", "parent", "children", "untried", "visits", "wins")
+
+    def __init__(self, rules, x, o, cell=None, parent=None):
+        self.x = x
+        self.o = o
+        self.cell = cell
+        self.parent = parent
+        self.children = []
+        # no moves follow a finished game
+        if cell is not None and (rules.wins_at(x, cell) or rules.wins_at(o, cell)):
+            self.untried = []
+        else:
+            self.untried = list(bitboard.cells(rules.candidates(x, o)))
+        self.visits = 0
+        # playouts won by the player who moved into this node, draws count half
+        self.wins = 0.0
+
+    def select_child(self, exploration):
+        """
+        Returns the child with the highest upper confidence bound (UCT).
+        """
+        log_visits = math.log(self.visits)
+        return max(
+            self.children,
+            key=lambda child: child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits)
+        )
+
+
+class MCTSPlayer():
+    """
+    Picks moves with MCTS, given either a number of iterations or a time
+    budget in seconds per move, for games played to k in a row (see
+    tictactoe.board_rules). The tree is kept between moves, so the
+    subtree of the position actually reached is reused.
+    """
+    def __init__(self, iterations=None, time_limit=1.0, exploration=math.sqrt(2), seed=None, k=None):
+        if iterations is None and time_limit is None:
+            raise ValueError("MCTSPlayer needs iterations or a time_limit")
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.exploration = exploration
+        self.random = random.Random(seed)
+        self.k = k
+        self.rules = None
+        self.root = None
+
+    def move(self, board):
+        """
+        Returns the action (i, j) to play on the board, None if it is terminal.
+        """
+        if ttt.terminal(board, self.k):
+            return None
+        rules = ttt.board_rules(board, self.k)
+        # a tree of another board size is of no use
+        if rules is not self.rules:
+            self.rules = rules
+            self.root = None
+        self.root = self.reuse(*bitboard.from_board(board))
+
+        deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        iterations = 0
+        while self.iterations is None or iterations < self.iterations:
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            self.iterate()
+            iterations += 1
+
+        # the most visited move is the most trusted, not the luckiest
+        if not self.root.children:
+            return divmod(self.root.untried[0], self.rules.cols)
+        best = max(self.root.children, key=lambda child: child.visits)
+        return divmod(best.cell, self.rules.cols)
+
+    def reuse(self, x, o):
+        """
+        Returns the node of the position (x, o) from the tree of the last
+        move when it is there, a new root otherwise.
+        """
+        # the position is usually our last move followed by the opponent's
+        frontier = [] if self.root is None else [self.root]
+        for _ in range(3):
+            for node in frontier:
+                if node.x == x and node.o == o:
+                    node.parent = None
+                    return node
+            frontier = [child for node in frontier for child in node.children]
+        return Node(self.rules, x, o)
+
+    def iterate(self):
+        """
+        Runs one selection, expansion, playout and backup.
+        """
+        node = self.root
+        # select down fully expanded nodes
+        while not node.untried and node.children:
+            node = node.select_child(self.exploration)
+
+        # expand one untried move
+        if node.untried:
+            cell = node.untried.pop(self.random.randrange(len(node.untried)))
+            x, o = node.x, node.o
+            if bitboard.x_to_move(x, o):
+                x |= 1 << cell
+            else:
+                o |= 1 << cell
+            child = Node(self.rules, x, o, cell, node)
+            node.children.append(child)
+            node = child
+
+        winner = self.playout(node)
+        # back up, scoring each node for the player who moved into it
+        while node is not None:
+            node.visits += 1
+            moved = ttt.O if bitboard.x_to_move(node.x, node.o) else ttt.X
+            if winner == moved:
+                node.wins += 1
+            elif winner is None:
+                node.wins += 0.5
+            node = node.parent
+
+    def playout(self, node):
+        """
+        Plays random moves from a node to the end of the game and returns
+        the winner, None for a draw.
+        """
+        rules = self.rules
+        x, o = node.x, node.o
+        if node.cell is not None:
+            if rules.wins_at(x, node.cell):
+                return ttt.X
+            if rules.wins_at(o, node.cell):
+                return ttt.O
+
+        free = list(bitboard.cells(rules.full & ~(x | o)))
+        self.random.shuffle(free)
+        x_turn = bitboard.x_to_move(x, o)
+        for cell in free:
+            if x_turn:
+                x |= 1 << cell
+                if rules.wins_at(x, cell):
+                    return ttt.X
+            else:
+                o |= 1 << cell
+                if rules.wins_at(o, cell):
+                    return ttt.O
+            x_turn = not x_turn
+        return None
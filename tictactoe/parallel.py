@@ -0,0 +1,140 @@
+"""
+Parallel root-split search for m,n,k games
+
+Splits the moves at the root of an engine.Engine search across a process
+pool, young brothers wait style: the eldest move, the best one of the
+previous iteration, is searched first to get a good alpha, then its
+younger brothers are searched at the same time. Workers publish every
+score they find to a shared alpha and read it before each move, so they
+still prune against each other's results.
+
+The pool of each game, by (rows, cols, k), is kept between searches like
+the engines of tictactoe.py, so its workers keep their transposition
+tables from one move to the next.
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bitboard
+import engine
+
+# the engine and shared alpha of a worker process, set by init_worker
+worker_engine = None
+shared_alpha = None
+
+# Maps the (rows, cols, k) of games searched so far to tuple of (pool, shared alpha, workers)
+pools = {}
+
+
+def fork_context():
+    """
+    Returns the multiprocessing context of the pool, fork where the
+    platform has it so that workers start without re-importing the game.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("fork" if "fork" in methods else None)
+
+
+def init_worker(rules, alpha):
+    global worker_engine, shared_alpha
+    worker_engine = engine.Engine(rules)
+    shared_alpha = alpha
+
+
+def search_move(me, opponent, cell, depth, bound, deadline):
+    """
+    Returns the score of the root move cell searched depth plies deep, or
+    None if deadline passed first.
+
+    The score is exact if it reaches the shared alpha and an upper bound
+    below it otherwise, so ties with the best move are always exact.
+    """
+    alpha = shared_alpha.value
+    if len(worker_engine.transpositions) > worker_engine.MAX_ENTRIES:
+        worker_engine.transpositions.clear()
+    worker_engine.deadline = deadline
+    worker_engine.root_depth = depth
+    try:
+        _, score = worker_engine.negamax(opponent, me | 1 << cell, depth - 1, -bound, 1 - alpha, cell)
+    except engine.TimeUp:
+        return None
+    score = -score
+
+    with shared_alpha.get_lock():
+        if score > shared_alpha.value:
+            shared_alpha.value = score
+    return score
+
+
+def worker_pool(rules, workers):
+    """
+    Returns tuple of (pool, shared alpha) of the game of rules, starting
+    the pool on first use or when the number of workers changed.
+    """
+    game = (rules.rows, rules.cols, rules.k)
+    if game in pools and pools[game][2] != workers:
+        pools.pop(game)[0].shutdown()
+    if game not in pools:
+        context = fork_context()
+        alpha = context.Value("q", 0)
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                   initializer=init_worker, initargs=(rules, alpha))
+        pools[game] = (pool, alpha, workers)
+    pool, alpha, _ = pools[game]
+    return pool, alpha
+
+
+def shutdown():
+    """
+    Stops the pools of all games.
+    """
+    while pools:
+        _, (pool, _, _) = pools.popitem()
+        pool.shutdown()
+
+
+def search(rules, x, o, time_limit=1.0, max_depth=None, workers=None):
+    """
+    Returns tuple of (best cell, score, depth) for the player to move, like
+    engine.Engine.search but with the root moves spread over workers
+    processes (one per CPU by default).
+
+    Of root moves with equal scores, the one first in board order wins, so
+    the move does not depend on which worker finished first.
+    """
+    me, opponent = (x, o) if bitboard.x_to_move(x, o) else (o, x)
+    empty = bin(rules.full & ~(x | o)).count("1")
+    max_depth = empty if max_depth is None else min(max_depth, empty)
+    bound = engine.WIN + empty + 1
+
+    # take a won line or block the opponent's like the sequential search does
+    wins = rules.threats(me, opponent)
+    if wins:
+        return next(bitboard.cells(wins)), engine.WIN, 1
+    moves = list(bitboard.cells(rules.threats(opponent, me) or rules.candidates(x, o)))
+
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    best = (moves[0], 0, 0)
+    pool, alpha = worker_pool(rules, workers or os.cpu_count())
+    order = list(moves)
+    for depth in range(1, max_depth + 1):
+        alpha.value = -bound
+        eldest = pool.submit(search_move, me, opponent, order[0], depth, bound, deadline).result()
+        if eldest is None:
+            break
+        # the younger brothers only start once the eldest set alpha
+        futures = [pool.submit(search_move, me, opponent, cell, depth, bound, deadline)
+                   for cell in order[1:]]
+        scores = dict(zip(order, [eldest] + [future.result() for future in futures]))
+        if None in scores.values():
+            break
+
+        best_score = max(scores.values())
+        best = (next(cell for cell in moves if scores[cell] == best_score), best_score, depth)
+        if abs(best_score) >= engine.WIN:
+            break
+        # search the best moves first next time, for an early high alpha
+        order.sort(key=lambda cell: -scores[cell])
+    return best
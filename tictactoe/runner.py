@@ -1,11 +1,14 @@
 import pygame
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import tictactoe as ttt
 
 pygame.init()
 size = width, height = 600, 400
+fps = 30
 
 # Colors
 black = (0, 0, 0)
@@ -17,14 +20,44 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+
+def ponder(board, stop, replies):
+    """
+    Fills replies, mapping the board after each user move, the most likely
+    first, to the AI's reply, until every move is done or stop is set.
+    """
+    likely = ttt.minimax(board, stop=stop)
+    for move in [likely] + sorted(ttt.actions(board) - {likely}):
+        expected = ttt.result(board, move)
+        reply = ttt.minimax(expected, stop=stop)
+        # a search cut short by stop has no trustworthy reply
+        if stop.is_set():
+            return
+        replies[board_key(expected)] = reply
+
+
+def board_key(board):
+    return tuple(map(tuple, board))
+
+
+# The AI searches on a worker thread so that the window keeps drawing
+worker = ThreadPoolExecutor(max_workers=1)
+clock = pygame.time.Clock()
+
 user = None
 board = ttt.initial_state()
-ai_turn = False
+# future of the AI move being searched
+thinking = None
+# replies found by ponder(board) while the user picks a move, None before it starts
+replies = None
+# set to stop the running ponder
+ponder_stop = threading.Event()
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            worker.shutdown(wait=False, cancel_futures=True)
             sys.exit()
 
     screen.fill(black)
@@ -102,21 +135,34 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            dots = "." * (pygame.time.get_ticks() // 300 % 4)
+            title = f"Computer thinking{dots}"
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, polling the worker once per frame
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if replies is not None:
+                # the worker runs one search at a time, stopping the ponder
+                # ends its running search so the real one starts at once
+                ponder_stop.set()
+                reply = replies.get(board_key(board))
+                replies = None
+                if reply is not None:
+                    board = ttt.result(board, reply)
+            elif thinking is None:
+                thinking = worker.submit(ttt.minimax, board)
+            elif thinking.done():
+                board = ttt.result(board, thinking.result())
+                thinking = None
+
+        # Search the replies to the user's likely moves while they think
+        if user == player and not game_over and replies is None:
+            ponder_stop = threading.Event()
+            replies = {}
+            worker.submit(ponder, board, ponder_stop, replies)
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -141,6 +187,9 @@ while True:
                     time.sleep(0.2)
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    thinking = None
+                    ponder_stop.set()
+                    replies = None
 
     pygame.display.flip()
+    clock.tick(fps)
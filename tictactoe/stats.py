@@ -0,0 +1,102 @@
+"""
+Search statistics for Tic Tac Toe players
+
+A MoveStats is handed to a search while it runs (see
+tictactoe.minimax_with_stats) and counts what the search did for one
+move. GameStats adds up the MoveStats of every move of a game.
+"""
+
+
+class MoveStats():
+    """
+    Counts of the search behind one move.
+    """
+    def __init__(self):
+        # searches started: 1 for minimax, one per iteration of iterative deepening
+        self.searches = 0
+        self.nodes = 0
+        # nodes whose children were searched
+        self.expanded = 0
+        # maps depth left to search (plies) to the alpha-beta cutoffs there
+        self.cutoffs = {}
+        self.transposition_hits = 0
+        # moves answered by the perfect-play table without a search
+        self.table_hits = 0
+        self.seconds = 0.0
+
+    def start_search(self):
+        self.searches += 1
+
+    def visit(self):
+        self.nodes += 1
+
+    def expand(self):
+        self.expanded += 1
+
+    def cutoff(self, depth):
+        self.cutoffs[depth] = self.cutoffs.get(depth, 0) + 1
+
+    def transposition_hit(self):
+        self.transposition_hits += 1
+
+    def table_hit(self):
+        self.table_hits += 1
+
+    @property
+    def branching_factor(self):
+        """
+        Returns the children searched per expanded node, after pruning.
+        """
+        if not self.expanded:
+            return 0.0
+        # every node but the search roots is a child of an expanded node
+        return (self.nodes - self.searches) / self.expanded
+
+    def add(self, other):
+        """
+        Adds the counts of another MoveStats to these.
+        """
+        self.searches += other.searches
+        self.nodes += other.nodes
+        self.expanded += other.expanded
+        for depth, count in other.cutoffs.items():
+            self.cutoffs[depth] = self.cutoffs.get(depth, 0) + count
+        self.transposition_hits += other.transposition_hits
+        self.table_hits += other.table_hits
+        self.seconds += other.seconds
+
+    def as_dict(self):
+        return {
+            "nodes": self.nodes,
+            "cutoffs": dict(sorted(self.cutoffs.items())),
+            "transposition_hits": self.transposition_hits,
+            "table_hits": self.table_hits,
+            "branching_factor": self.branching_factor,
+            "seconds": self.seconds
+        }
+
+
+class GameStats():
+    """
+    The MoveStats of every move of a game, in order.
+    """
+    def __init__(self):
+        self.moves = []
+
+    def add(self, move_stats):
+        self.moves.append(move_stats)
+
+    def total(self):
+        """
+        Returns a MoveStats holding the counts of all moves together.
+        """
+        total = MoveStats()
+        for move_stats in self.moves:
+            total.add(move_stats)
+        return total
+
+    def as_dict(self):
+        return {
+            "moves": [move_stats.as_dict() for move_stats in self.moves],
+            "total": self.total().as_dict()
+        }
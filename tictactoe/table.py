@@ -0,0 +1,111 @@
+"""
+Perfect-play table for Tic Tac Toe
+
+Solves every position reachable from the empty board once and stores its
+optimal move and value in a file of one byte per board, indexed by the
+base-3 number whose digit i is 0, 1 or 2 for an empty, X or O cell i.
+Each byte holds the move cell in its low 4 bits (NO_MOVE once the game is
+over) and the value + 1 in the bits above, UNKNOWN for boards that cannot
+be reached in a game.
+
+Usage: python table.py [output]
+"""
+import os
+import sys
+
+import bitboard
+
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perfect_play.bin")
+SIZE = 3 ** 9
+UNKNOWN = 0xFF
+NO_MOVE = 0xF
+
+# BASE3[mask] is the base-3 number with digit 1 at every cell of mask
+BASE3 = tuple(sum(3 ** cell for cell in bitboard.cells(mask)) for mask in range(bitboard.FULL + 1))
+
+# the loaded table, read from TABLE_FILE on first lookup
+entries = None
+
+
+def index(x, o):
+    """
+    Returns the base-3 index of a position.
+    """
+    return BASE3[x] + 2 * BASE3[o]
+
+
+def encode(cell, value):
+    return (value + 1) << 4 | (NO_MOVE if cell is None else cell)
+
+
+def decode(entry):
+    """
+    Returns tuple of (cell, value) of a table entry.
+    """
+    cell = entry & 0xF
+    return (None if cell == NO_MOVE else cell), (entry >> 4) - 1
+
+
+def build(solve):
+    """
+    Returns the table of every position reachable from the empty board,
+    where solve(x, o) returns the (optimal cell, value) of a position.
+    """
+    table = bytearray([UNKNOWN]) * SIZE
+    frontier = [(0, 0)]
+    while frontier:
+        x, o = frontier.pop()
+        position = index(x, o)
+        if table[position] != UNKNOWN:
+            continue
+        table[position] = encode(*solve(x, o))
+
+        # no moves follow a won or drawn game
+        if bitboard.WINS[x] or bitboard.WINS[o]:
+            continue
+        for cell in bitboard.free_cells(x, o):
+            if bitboard.x_to_move(x, o):
+                frontier.append((x | 1 << cell, o))
+            else:
+                frontier.append((x, o | 1 << cell))
+    return table
+
+
+def load(filename=TABLE_FILE):
+    """
+    Returns the table stored in filename, None if it is missing or invalid.
+    """
+    try:
+        with open(filename, "rb") as f:
+            table = f.read()
+    except OSError:
+        return None
+    return table if len(table) == SIZE else None
+
+
+def lookup(x, o):
+    """
+    Returns tuple of (optimal cell, value) of a position, None if the
+    table is not built or the position is not in it.
+    """
+    global entries
+    if entries is None:
+        entries = load() or b""
+    if not entries or entries[index(x, o)] == UNKNOWN:
+        return None
+    return decode(entries[index(x, o)])
+
+
+def main():
+    # solving goes through the search, so import it only for the build step
+    import tictactoe
+
+    filename = sys.argv[1] if len(sys.argv) > 1 else TABLE_FILE
+    table = build(tictactoe.solve)
+    with open(filename, "wb") as f:
+        f.write(table)
+    print(f"Solved {SIZE - table.count(UNKNOWN)} positions into {filename}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,32 +3,64 @@ Tic Tac Toe Player
 """
 
 import math
-import copy
+import time
+
+import bitboard
+import engine
+import parallel
+import stats
+import table
 
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Maps canonical position keys to (flag, value, move) of searched positions,
+# value is exact or only a lower / upper bound when the search was pruned
+transpositions = {}
+EXACT = "exact"
+LOWER = "lower"
+UPPER = "upper"
+
+# Longest line needed to win, 3x3 plays 3 in a row and 15x15 gomoku 5
+MAX_WIN_LENGTH = 5
+# Seconds the AI may think on boards too big to search to the end
+TIME_LIMIT = 1.0
+
+# Rules and search engine of each (rows, cols, k) game played so far
+rules_by_game = {}
+engines = {}
 
-def initial_state():
+# MoveStats of the running minimax_with_stats call, None when not collecting
+collector = None
+
+
+def initial_state(rows=3, cols=3):
     """
     Returns starting state of the board.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * cols for _ in range(rows)]
+
+
+def board_rules(board, k=None):
+    """
+    Returns the bitboard.Rules of a board played to k in a row, by default
+    min(rows, cols, MAX_WIN_LENGTH).
+    """
+    rows, cols = len(board), len(board[0])
+    game = (rows, cols, min(rows, cols, MAX_WIN_LENGTH) if k is None else k)
+    if game not in rules_by_game:
+        rules_by_game[game] = bitboard.Rules(*game)
+    return rules_by_game[game]
 
 
 def player(board):
     """
     Returns player who has the next turn on a board.
     """
-    # find number of moves made on the board
-    moves_made = 9 - sum([row.count(EMPTY) for row in board])
-    
-    # if number of moves made is even -> it is X turn and O turn otherwise
-    if moves_made%2==0:
+    # X moves whenever both players made the same number of moves
+    if bitboard.x_to_move(*bitboard.from_board(board)):
         return X
     return O
     
@@ -37,115 +69,248 @@ def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
-    possible_actions = set()
+    rules = board_rules(board)
+    x, o = bitboard.from_board(board)
     
     # possible acitons includes all empty cells on board
-    for row, row_items in enumerate(board):
-        for col, cell in enumerate(row_items):
-            if cell == EMPTY:
-                possible_actions.add((row, col))
-    
-    return possible_actions
+    return {divmod(cell, rules.cols) for cell in bitboard.cells(rules.full & ~(x | o))}
 
 
 def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
+    rules = board_rules(board)
+    x, o = bitboard.from_board(board)
     
     # check if action is legal
-    possible_actions = actions(board)
-    if action not in possible_actions:
+    i, j = action
+    cell = i * rules.cols + j
+    if not (0 <= i < rules.rows and 0 <= j < rules.cols) or (x | o) >> cell & 1:
         raise Exception("Illegal move")
     
     # create the result board from given move
-    curr_player = player(board)
-    i, j = action
-    board_copy = copy.deepcopy(board)
-    board_copy[i][j] = curr_player
+    if bitboard.x_to_move(x, o):
+        x |= 1 << cell
+    else:
+        o |= 1 << cell
     
-    return board_copy
+    return bitboard.to_board(x, o, EMPTY, rules.rows, rules.cols)
 
 
-def winner(board):
+def winner(board, k=None):
     """
     Returns the winner of the game, if there is one.
+
+    k is the number in a row that wins, see board_rules.
     """
-    
-    # check each row of the board
-    for row in board:
-        # count number of moves each row and return the winner if no moves is 3
-        if row.count(X) == 3:
-            return X
-        if row.count(O) == 3:
-            return O
-        
-    # check each column of the board
-    for col in range(len(board[0])):
-        # return winner if they have 3 moves in a column
-        if board[0][col] == board[1][col] and board[1][col] == board[2][col]:
-            return board[0][col]
-
-    # check diagonal
-    if board[0][0] == board[1][1] and board[1][1] == board[2][2]:
-        return board[0][0]
-    elif board[2][0] == board[1][1] and board[1][1] == board[0][2]:
-        return board[1][1]
+    rules = board_rules(board, k)
+    x, o = bitboard.from_board(board)
+    if rules.has_line(x):
+        return X
+    if rules.has_line(o):
+        return O
     
     # if no winner found, return None
     return None
 
-def terminal(board):
+def terminal(board, k=None):
     """
     Returns True if game is over, False otherwise.
+
+    k is the number in a row that wins, see board_rules.
     """
+    rules = board_rules(board, k)
+    x, o = bitboard.from_board(board)
     
-    # game is over when there are no possible action or a winner is found
-    return (len(actions(board)) == 0) or (winner(board))
+    # game is over when the board is full or a winner is found
+    return x | o == rules.full or rules.has_line(x) or rules.has_line(o)
 
 
-def utility(board):
+def utility(board, k=None):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+
+    k is the number in a row that wins, see board_rules.
     """
-    if winner(board) == X: 
+    rules = board_rules(board, k)
+    x, o = bitboard.from_board(board)
+    if rules.has_line(x):
         return 1
-    elif winner(board) == O:
+    if rules.has_line(o):
         return -1
-    
     return 0
 
 
-def minimax(board):
+def minimax(board, time_limit=TIME_LIMIT, workers=1, k=None, stop=None):
     """
-    Returns the optimal action for the current player on the board.
+    Returns the optimal action for the current player on the board, played
+    to k in a row (see board_rules).
+
+    Games other than 3x3 with 3 in a row get the best action an
+    iterative-deepening search finds within time_limit seconds, split over
+    workers processes when there is more than one. Setting stop, a
+    threading.Event, ends a search in this process like the time limit.
     """
-    # X wins when value is 1 -> X is max player and O is the min player
-    if terminal(board):
+    if terminal(board, k):
         return None
-    elif player(board) == X: 
-        optimal_move, _ = max_player(board)
-        return optimal_move
-    else:
-        optimal_move, _ = min_player(board)
-        return optimal_move
-    
-    
+    x, o = bitboard.from_board(board)
+
+    rules = board_rules(board, k)
+    # the table and solve only know 3x3 tic tac toe
+    classic = (rules.rows, rules.cols, rules.k) == (3, 3, 3)
+    if not classic and workers > 1:
+        cell, _, _ = parallel.search(rules, x, o, time_limit, workers=workers)
+        return divmod(cell, rules.cols)
+    if not classic:
+        game = (rules.rows, rules.cols, rules.k)
+        if game not in engines:
+            engines[game] = engine.Engine(rules)
+        engines[game].stats = collector
+        engines[game].stop = stop
+        cell, _, _ = engines[game].search(x, o, time_limit)
+        return divmod(cell, rules.cols)
+
+    # every board reachable in a game is answered by the perfect-play table
+    known = table.lookup(x, o)
+    if known is not None:
+        if collector is not None:
+            collector.table_hit()
+        return to_action(known[0])
+
+    if collector is not None:
+        collector.start_search()
+    optimal_move, _ = solve(x, o)
+    return to_action(optimal_move)
+
+
+def minimax_with_stats(board, game_stats=None, time_limit=TIME_LIMIT, k=None):
+    """
+    Returns tuple of (optimal action, stats.MoveStats of its search) like
+    minimax, adding the MoveStats to game_stats (a stats.GameStats) if given.
+
+    Only one minimax_with_stats call may run at a time.
+    """
+    global collector
+    move_stats = stats.MoveStats()
+    collector = move_stats
+    start = time.perf_counter()
+    try:
+        action = minimax(board, time_limit, k=k)
+    finally:
+        collector = None
+    move_stats.seconds = time.perf_counter() - start
+
+    if game_stats is not None:
+        game_stats.add(move_stats)
+    return action, move_stats
+
+
+def solve(x, o):
+    """
+    Returns tuple of (optimal cell, optimal value) for the player to move
+    on a bitboard, searching it with minimax.
+    """
+    # X wins when value is 1 -> X is max player and O is the min player
+    if bitboard.x_to_move(x, o):
+        return max_value(x, o, -math.inf, math.inf)
+    return min_value(x, o, -math.inf, math.inf)
+
+
 def max_player(board, alpha=-math.inf, beta=math.inf):
     """
         Return tuple of (optimal action, optimal value) for max player
     """
+    move, value = max_value(*bitboard.from_board(board), alpha, beta)
+    return to_action(move), value
+
+
+def min_player(board, alpha=-math.inf, beta=math.inf):
+    """
+        Return tuple of (optimal action, optimal value) for min player
+    """
+    move, value = min_value(*bitboard.from_board(board), alpha, beta)
+    return to_action(move), value
+
+
+def to_action(cell):
+    """
+    Returns the (i, j) action of a bitboard cell.
+    """
+    return None if cell is None else divmod(cell, 3)
+
+
+def position_utility(x, o):
+    """
+    Returns 1 if X has won the position, -1 if O has won, 0 otherwise.
+    """
+    if bitboard.WINS[x]:
+        return 1
+    if bitboard.WINS[o]:
+        return -1
+    return 0
+
+
+def lookup(x, o, alpha, beta):
+    """
+    Returns (cell, value) stored for a position if it settles the search
+    within (alpha, beta), None otherwise.
+    """
+    key, symmetry = bitboard.canonical(x, o)
+    entry = transpositions.get(key)
+    if entry is None:
+        return None
+
+    flag, value, cell = entry
+    # bounds only settle the search when they fall outside the window
+    if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+        # map the stored cell back from the canonical position
+        return (None if cell is None else bitboard.INVERSES[symmetry][cell]), value
+    return None
+
+
+def store(x, o, alpha, beta, cell, value):
+    """
+    Stores the result of searching a position within (alpha, beta).
+    """
+    if value <= alpha:
+        flag = UPPER
+    elif value >= beta:
+        flag = LOWER
+    else:
+        flag = EXACT
+
+    key, symmetry = bitboard.canonical(x, o)
+    transpositions[key] = (flag, value, None if cell is None else bitboard.SYMMETRIES[symmetry][cell])
+
+
+def max_value(x, o, alpha, beta):
+    """
+        Return tuple of (optimal cell, optimal value) for X to move on a bitboard
+    """
+    if collector is not None:
+        collector.visit()
     
-    if terminal(board):
-        return None, utility(board)
+    if bitboard.WINS[x] or bitboard.WINS[o] or x | o == bitboard.FULL:
+        return None, position_utility(x, o)
+
+    # reuse the result of an earlier search of this position or a symmetric one
+    stored = lookup(x, o, alpha, beta)
+    if stored is not None:
+        if collector is not None:
+            collector.transposition_hit()
+        return stored
+    if collector is not None:
+        collector.expand()
+    alpha_orig = alpha
     
     optimal_move = None
     optimal_value = -math.inf
     
     # go through all possible moves:
-    for move in actions(board):            
+    for move in bitboard.free_cells(x, o):
         # get moves that return min utility
-        _, val = min_player(result(board, move), alpha=alpha, beta=beta)
+        _, val = min_value(x | 1 << move, o, alpha, beta)
         
         # update optimal value and move if a move with higher value is found
         if val > optimal_value:
@@ -154,28 +319,44 @@ def max_player(board, alpha=-math.inf, beta=math.inf):
             
         # update alpha value
         alpha = max(optimal_value, alpha)
-        # if lower bound i.e. alpha is higher than beta -> prune
-        if alpha > beta:
+        # once alpha reaches beta the other player avoids this position -> prune
+        if alpha >= beta:
+            if collector is not None:
+                # every empty cell is a ply left to search
+                collector.cutoff(bin(bitboard.FULL & ~(x | o)).count("1"))
             break
-        
+
+    store(x, o, alpha_orig, beta, optimal_move, optimal_value)
     return optimal_move, optimal_value
         
         
-def min_player(board, alpha=-math.inf, beta=math.inf):
+def min_value(x, o, alpha, beta):
     """
-        Return tuple of (optimal action, optimal value) for min player
+        Return tuple of (optimal cell, optimal value) for O to move on a bitboard
     """
+    if collector is not None:
+        collector.visit()
     
-    if terminal(board):
-        return None, utility(board)
+    if bitboard.WINS[x] or bitboard.WINS[o] or x | o == bitboard.FULL:
+        return None, position_utility(x, o)
+
+    # reuse the result of an earlier search of this position or a symmetric one
+    stored = lookup(x, o, alpha, beta)
+    if stored is not None:
+        if collector is not None:
+            collector.transposition_hit()
+        return stored
+    if collector is not None:
+        collector.expand()
+    beta_orig = beta
     
     optimal_move = None
     optimal_value = math.inf
     
     # go through all possible moves:
-    for move in actions(board):
-        # get moves that return min utility
-        _, val = max_player(result(board, move), alpha=alpha, beta=beta)
+    for move in bitboard.free_cells(x, o):
+        # get moves that return max utility
+        _, val = max_value(x, o | 1 << move, alpha, beta)
         
         # update optimal value and move if a move with lower value is found
         if val < optimal_value:
@@ -184,8 +365,12 @@ def min_player(board, alpha=-math.inf, beta=math.inf):
             
         # update beta value
         beta = min(optimal_value, beta)
-        # if lower bound i.e. alpha is higher than beta -> prune
-        if alpha > beta:
+        # once alpha reaches beta the other player avoids this position -> prune
+        if alpha >= beta:
+            if collector is not None:
+                # every empty cell is a ply left to search
+                collector.cutoff(bin(bitboard.FULL & ~(x | o)).count("1"))
             break
-            
-    return optimal_move, optimal_value
\ No newline at end of file
+
+    store(x, o, alpha, beta_orig, optimal_move, optimal_value)
+    return optimal_move, optimal_value